@@ -241,7 +241,8 @@ const app = Vue.createApp({
                     }
                 } else {
                     // 使用后端TTS服务获取语音列表
-                    const response = await axios.get(`/api/tts/voices?engine=${this.ttsEngine}`)
+                    // 只获取页面会用到的简体中文和英文语音
+                    const response = await axios.get(`/api/tts/voices?engine=${this.ttsEngine}&locale=zh-CN,en-US,en-GB`)
                     console.log('语音数据:', response.data)  // 调试输出
                     
                     if (response.data.success) {
@@ -1,15 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from ...services.file_service import FileService
+from ...services.file_service import FileService, get_file_service
 from pathlib import Path
 from ...config.settings import Settings
 
 router = APIRouter(prefix="/api/lessons", tags=["lessons"])
 settings = Settings()
 
-def get_file_service():
-    return FileService(settings.WORDS_FILE)
-
 @router.get("")
 async def get_lessons(
     file_service: FileService = Depends(get_file_service)
@@ -21,6 +19,53 @@ async def get_lessons(
         "data": lessons
     }
 
+class LessonRef(BaseModel):
+    grade: str
+    lesson: str
+
+class BulkWordsRequest(BaseModel):
+    lessons: List[LessonRef] = Field(..., max_length=200)  # 一次最多查询的课程数
+
+@router.post("/bulk")
+async def get_bulk_words(
+    request: BulkWordsRequest,
+    file_service: FileService = Depends(get_file_service)
+):
+    """一次获取多个课程的单词列表，不存在的课程 words 为 null"""
+    lessons = file_service.get_words_bulk([(item.grade, item.lesson) for item in request.lessons])
+    for item in lessons:
+        item["total"] = len(item["words"]) if item["words"] is not None else 0
+    return {
+        "success": True,
+        "data": lessons
+    }
+
+@router.get("/search")
+async def search_words(
+    q: str,
+    mode: str = "exact",
+    limit: int = Query(50, ge=1, le=500),
+    file_service: FileService = Depends(get_file_service)
+):
+    """
+    按词语查找课程
+    
+    Args:
+        q: 查询内容
+        mode: exact（完全相同）、prefix（前缀）、char（包含每一个字）
+        limit: 最多返回的词语数
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="查询内容不能为空")
+    try:
+        results = file_service.search_words(q, mode, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "success": True,
+        "data": results
+    }
+
 @router.get("/{grade}/{lesson}/words")
 async def get_lesson_words(
     grade: str,
@@ -48,7 +93,7 @@ async def add_lesson_words(
     file_service: FileService = Depends(get_file_service)
 ):
     """添加单词到指定课程"""
-    success = file_service.add_words(grade, lesson, words)
+    success = await file_service.add_words(grade, lesson, words)
     if not success:
         raise HTTPException(status_code=500, detail="添加单词失败")
         
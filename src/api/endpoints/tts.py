@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from typing import Optional, List
 from ...services.tts.factory import TTSFactory
+from ...services.tts.upstream import CircuitOpenError, Priority
+from ...services.tts.exporter import DictationExporter, export_key
+from ...services.tts.jobs import ExportJob, ExportJobQueue, JobQueueFull
+from ...services.workspace import sweep_workspaces
+from ...services.tts.prewarmer import get_prewarmer
 from ...config.settings import Settings
 from pydantic import BaseModel
 import tempfile
@@ -10,14 +15,14 @@ import asyncio
 import os
 import edge_tts
 import time
-import subprocess
 import traceback
 import logging
-import platform
 import shutil
 import aiohttp
 from aiohttp import ClientSession, TCPConnector
 import json
+import math
+from urllib.parse import quote
 
 # 配置日志
 logging.basicConfig(level=logging.DEBUG)
@@ -28,15 +33,18 @@ settings = Settings()
 
 # 创建必要的目录
 BASE_DIR = Path().absolute()
-MP3_DIR = BASE_DIR / "MP3"
 CACHE_DIR = BASE_DIR / "cache/tts"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
-MP3_DIR.mkdir(exist_ok=True)
 
 # 缓存文件路径
 START_PROMPT_FILE = CACHE_DIR / "start_prompt.mp3"
 END_PROMPT_FILE = CACHE_DIR / "end_prompt.mp3"
-SILENCE_FILE = CACHE_DIR / "silence_1s.mp3"
+
+# 批量导出任务的工作目录，每个任务一个子目录
+JOBS_DIR = CACHE_DIR / "jobs"
+
+# 已导出的听写音频，按参数和词语列表的哈希缓存
+EXPORTS_DIR = CACHE_DIR / "exports"
 
 async def init_cache_files():
     """初始化缓存文件"""
@@ -59,38 +67,34 @@ async def init_cache_files():
             )
             await communicate.save(str(END_PROMPT_FILE))
 
-        # 生成1秒静音文件
-        if not SILENCE_FILE.exists():
-            logger.info("生成静音文件缓存")
-            cmd = [
-                'ffmpeg', '-f', 'lavfi',
-                '-i', 'anullsrc=r=44100:cl=stereo',
-                '-t', '1',
-                '-q:a', '9',
-                '-acodec', 'libmp3lame',
-                str(SILENCE_FILE),
-                '-y'
-            ]
-            if platform.system() == 'Windows':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                result = subprocess.run(cmd, capture_output=True, startupinfo=startupinfo)
-            else:
-                result = subprocess.run(cmd, capture_output=True)
-
-            if result.returncode != 0:
-                stderr = result.stderr.decode('utf-8', errors='ignore')
-                raise Exception(f"生成静音文件失败: {stderr}")
+        # 清理异常退出遗留的导出任务工作目录（以及旧版本共用的 temp 目录）
+        removed = await asyncio.to_thread(sweep_workspaces, JOBS_DIR, settings.TTS_CACHE_TEMP_MAX_AGE)
+        if removed:
+            logger.info(f"已清理 {removed} 个遗留的导出任务目录")
+        await asyncio.to_thread(shutil.rmtree, CACHE_DIR / "temp", True)
 
     except Exception as e:
         logger.error(f"初始化缓存文件失败: {str(e)}\n{traceback.format_exc()}")
         raise
 
+class AudioResponse(Response):
+    """音频响应，接受 bytes 和 memoryview（打包缓存返回的内存映射切片）"""
+    media_type = "audio/mpeg"
+    
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, memoryview):
+            # 中间件（BaseHTTPMiddleware）转发响应体时只接受 bytes，这里拷贝一次
+            return bytes(content)
+        return super().render(content)
+
 class TTSRequest(BaseModel):
     text: str
     engine: str = "edge-tts"
     voice: Optional[str] = None
     rate: float = 1.0
+    stream: bool = False  # 是否边生成边返回音频
 
 class BatchTTSRequest(BaseModel):
     words: List[str]
@@ -101,6 +105,7 @@ class BatchTTSRequest(BaseModel):
     repeatInterval: float = 3.0
     grade: Optional[str] = None
     lesson: Optional[str] = None
+    stream: bool = False  # 是否边生成边返回音频（未缓存时）
 
 class CacheCheckRequest(BaseModel):
     words: List[str]
@@ -120,203 +125,250 @@ class CheckCacheResponse(BaseModel):
     progress: int  # 添加进度字段
     total: int     # 添加总数字段
 
-async def generate_audio_with_retry(text: str, voice: str, rate: float, output_file: Path, max_retries: int = 3, retry_delay: float = 1.0):
-    """带重试机制的音频生成函数"""
-    for attempt in range(max_retries):
-        try:
-            # 创建 Communicate 实例
-            rate_str = "+" if rate >= 1 else "-"
-            rate_str += f"{abs(int((rate - 1) * 100))}%"
-            communicate = edge_tts.Communicate(
-                text,
-                voice,
-                rate=rate_str
-            )
-            
-            # 设置不验证 SSL
-            communicate._client_session_kwargs = {
-                "connector": TCPConnector(verify_ssl=False)
-            }
-            
-            # 生成音频
-            await communicate.save(str(output_file))
-            return True
-                
-        except aiohttp.ClientError as e:
-            logger.warning(f"第 {attempt + 1} 次尝试生成音频失败: {str(e)}")
-            if attempt < max_retries - 1:
-                wait_time = retry_delay * (2 ** attempt)  # 指数退避
-                logger.info(f"等待 {wait_time:.1f} 秒后重试...")
-                await asyncio.sleep(wait_time)
-            else:
-                logger.error(f"生成音频失败，已达到最大重试次数: {str(e)}")
-                raise
-                
-        except Exception as e:
-            logger.error(f"生成音频时发生未知错误: {str(e)}\n{traceback.format_exc()}")
-            raise
+class ClientDisconnected(Exception):
+    """客户端在请求处理完成前断开了连接"""
+
+async def cancel_on_disconnect(http_request: Request, awaitable, poll_interval: float = 0.5):
+    """
+    执行任务的同时检查客户端连接，断开时取消任务
+    
+    Raises:
+        ClientDisconnected: 客户端已断开，任务已被取消
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+def get_download_filename(request: BatchTTSRequest) -> str:
+    """使用年级和课时信息生成下载文件名"""
+    filename_parts = []
+    if request.grade:
+        safe_grade = "".join(x for x in request.grade if x.isalnum())
+        filename_parts.append(safe_grade)
+    if request.lesson:
+        safe_lesson = "".join(x for x in request.lesson if x.isalnum())
+        filename_parts.append(safe_lesson)
+        
+    # 如果没有年级和课时信息，使用时间戳
+    if not filename_parts:
+        filename_parts.append(str(int(time.time())))
+    return f"{'_'.join(filename_parts)}_听写.mp3"
 
 @router.post("/batch")
-async def generate_batch_speech(request: BatchTTSRequest):
+async def generate_batch_speech(request: BatchTTSRequest, http_request: Request):
     """生成批量语音文件"""
-    temp_dir = None
-    temp_audio_dir = None
-    audio_files = []
-    concat_list = None
-    output_file = None
-    
     try:
         logger.info(f"开始处理批量语音生成请求: {request}")
         
         # 获取默认语音
         voice = request.voice or settings.TTS_ENGINES[request.engine]["default_voice"]
         logger.debug(f"使用语音: {voice}")
+        tts_service = get_tts_service(request.engine)
+        if tts_service is None:
+            raise HTTPException(status_code=400, detail="Web Speech 在浏览器中合成，不支持导出音频文件")
+        
+        # 相同参数和词语列表的导出结果是确定的，缓存键可直接作为 ETag
+        key = export_key(
+            request.words,
+            voice,
+            request.rate,
+            request.repeatCount,
+            request.repeatInterval
+        )
+        etag = f'"{key}"'
+        exporter = get_exporter(tts_service)
+        if http_request.headers.get("if-none-match") == etag and await exporter.cached_path(key) is not None:
+            return Response(status_code=304, headers={"ETag": etag, "X-Export-Id": key})
         
-        # 创建临时目录
-        temp_dir = CACHE_DIR / "temp"
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-        temp_dir.mkdir(exist_ok=True)
-        logger.debug(f"使用临时目录: {temp_dir}")
+        filename = get_download_filename(request)
         
-        # 使用年级和课时信息生成文件名
-        filename_parts = []
-        if request.grade:
-            safe_grade = "".join(x for x in request.grade if x.isalnum())
-            filename_parts.append(safe_grade)
-        if request.lesson:
-            safe_lesson = "".join(x for x in request.lesson if x.isalnum())
-            filename_parts.append(safe_lesson)
+        # 流式模式：先发送开始提示音，每个词语生成后立即按顺序发送（按帧拼接时才支持）
+        if (
+            request.stream
+            and settings.AUDIO_CONCAT_ENGINE == "python"
+            and await exporter.cached_path(key) is None
+        ):
+            logger.info(f"开始流式导出 {len(request.words)} 个词语的听写音频")
+            audio_stream = exporter.stream(
+                request.words,
+                voice,
+                request.rate,
+                request.repeatCount,
+                request.repeatInterval
+            )
             
-        # 如果没有年级和课时信息，使用时间戳
-        if not filename_parts:
-            filename_parts.append(str(int(time.time())))
+            async def forward():
+                try:
+                    async for chunk in audio_stream:
+                        yield chunk
+                except Exception as e:
+                    logger.error(f"流式导出听写音频中断: {str(e)}")
+                    # 响应头已发送，继续抛出让连接异常结束，客户端不会把不完整的音频当作成功
+                    raise
             
-        output_file = temp_dir / f"{'_'.join(filename_parts)}.mp3"
-        logger.debug(f"输出文件: {output_file}")
-        
-        # 创建临时目录用于存放单个音频文件
-        temp_audio_dir = temp_dir / "audio"
-        temp_audio_dir.mkdir(exist_ok=True)
+            return StreamingResponse(
+                forward(),
+                media_type="audio/mpeg",
+                headers={
+                    "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+                    "X-Export-Id": key
+                }
+            )
         
+        # 未缓存时：通过共享缓存获取每个词语的音频（以批量导出优先级并发生成），
+        # 在独立的工作目录中合并后存入导出缓存；相同的导出同时进行时只生成一次
+        logger.info(f"开始导出 {len(request.words)} 个词语的听写音频")
         try:
-            # 生成每个词语的音频文件
-            logger.info(f"开始生成 {len(request.words)} 个词语的音频")
-            for i, word in enumerate(request.words, 1):
-                logger.debug(f"生成第 {i}/{len(request.words)} 个词语: {word}")
-                word_file = temp_audio_dir / f"word_{i}.mp3"
-                await generate_audio_with_retry(
-                    word,
+            # 客户端断开连接时取消等待，没有其他等待方时取消导出（包括终止 FFmpeg 进程）
+            key, export_file = await cancel_on_disconnect(
+                http_request,
+                exporter.export(
+                    request.words,
                     voice,
                     request.rate,
-                    word_file
+                    request.repeatCount,
+                    request.repeatInterval
                 )
-                audio_files.append(word_file)
-            
-            # 创建合并列表文件
-            logger.info("创建音频合并列表")
-            concat_list = temp_audio_dir / "concat.txt"
-            with open(concat_list, "w", encoding="utf-8") as f:
-                def write_file_path(path: Path, repeat: int = 1):
-                    # 写入指定次数的文件路径
-                    return "".join([f"file '{str(path.absolute())}'\n" for _ in range(repeat)])
-                
-                # 添加开始提示音和停顿
-                f.write(write_file_path(START_PROMPT_FILE))
-                f.write(write_file_path(SILENCE_FILE, 3))  # 3秒停顿
-                
-                for word_file in audio_files:
-                    # 每个词语重复指定次数
-                    for _ in range(request.repeatCount):
-                        f.write(write_file_path(word_file))
-                        if _ < request.repeatCount - 1:
-                            # 词语重复之间的停顿
-                            f.write(write_file_path(SILENCE_FILE, int(request.repeatInterval)))
-                    if word_file != audio_files[-1]:
-                        # 词语之间的停顿
-                        f.write(write_file_path(SILENCE_FILE, int(request.repeatInterval * 2)))
-                
-                # 添加结束提示音和停顿
-                f.write(write_file_path(SILENCE_FILE, 2))  # 2秒停顿
-                f.write(write_file_path(END_PROMPT_FILE))
-            
-            # 打印合并列表内容用于调试
-            logger.debug("合并列表文件内容:")
-            with open(concat_list, "r", encoding="utf-8") as f:
-                logger.debug(f.read())
-            
-            # 合并音频文件
-            logger.info("开始合并音频文件")
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', str(concat_list),
-                '-c', 'copy',
-                str(output_file),
-                '-y'
-            ]
-            logger.debug(f"执行命令: {' '.join(cmd)}")
-            
-            # 在 Windows 上，需要禁用控制台窗口
-            if platform.system() == 'Windows':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                result = subprocess.run(cmd, capture_output=True, startupinfo=startupinfo)
-            else:
-                result = subprocess.run(cmd, capture_output=True)
-                
-            if result.returncode != 0:
-                stderr = result.stderr.decode('utf-8', errors='ignore')
-                error_msg = f"合并音频文件失败: {stderr}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            
-            # 检查输出文件是否存在且大小大于0
-            if not output_file.exists() or output_file.stat().st_size == 0:
-                error_msg = "合并音频文件失败: 输出文件不存在或为空"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            
-            logger.info("音频文件合并成功")
-            
-            # 复制输出文件到 MP3 目录
-            final_output = MP3_DIR / f"{'_'.join(filename_parts)}.mp3"
-            shutil.copy2(output_file, final_output)
-            
-            # 检查最终文件是否存在且大小大于0
-            if not final_output.exists() or final_output.stat().st_size == 0:
-                error_msg = "复制音频文件失败: 目标文件不存在或为空"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            
-            logger.info(f"已将音频文件复制到: {final_output} (大小: {final_output.stat().st_size} 字节)")
-            
-            logger.info("批量语音生成完成")
-            return FileResponse(
-                final_output,
-                media_type="audio/mpeg",
-                filename=f"{'_'.join(filename_parts)}_听写.mp3"
             )
+        except ClientDisconnected:
+            logger.info("客户端已断开连接，取消导出音频")
+            return Response(status_code=499)
+        
+        logger.info(f"批量语音生成完成: {export_file} (大小: {export_file.stat().st_size} 字节)")
+        return FileResponse(
+            export_file,
+            media_type="audio/mpeg",
+            filename=filename,
+            headers={"ETag": etag, "X-Export-Id": key}
+        )
             
-        finally:
-            # 清理临时音频文件
-            logger.debug("清理临时文件")
-            try:
-                if temp_audio_dir and temp_audio_dir.exists():
-                    shutil.rmtree(temp_audio_dir)
-                if output_file and output_file.exists():
-                    output_file.unlink()
-            except Exception as e:
-                logger.error(f"清理临时文件时出错: {str(e)}\n{traceback.format_exc()}")
-            
+    except HTTPException:
+        raise
+    except CircuitOpenError as e:
+        logger.warning(f"生成批量语音失败: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         error_msg = f"生成批量语音失败: {str(e)}\n{traceback.format_exc()}"
         logger.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
+@router.post("/jobs", status_code=202)
+async def submit_export_job(request: BatchTTSRequest):
+    """提交后台导出任务，立即返回任务 ID，进度见 /jobs/{id}/events，完成后从 /jobs/{id}/download 下载"""
+    voice = request.voice or settings.TTS_ENGINES[request.engine]["default_voice"]
+    tts_service = get_tts_service(request.engine)
+    if tts_service is None:
+        raise HTTPException(status_code=400, detail="Web Speech 在浏览器中合成，不支持导出音频文件")
+    
+    try:
+        job = get_job_queue(tts_service).submit(
+            request.words,
+            voice,
+            request.rate,
+            request.repeatCount,
+            request.repeatInterval,
+            get_download_filename(request)
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    logger.info(f"已提交导出任务 {job.id}（{len(request.words)} 个词语）")
+    return {
+        "success": True,
+        "data": job.to_dict()
+    }
+
+def get_job(job_id: str) -> ExportJob:
+    """获取导出任务，不存在时返回 404"""
+    job = _job_queue.get(job_id) if _job_queue is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="导出任务不存在或已过期")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str):
+    """查询导出任务状态"""
+    return {
+        "success": True,
+        "data": get_job(job_id).to_dict()
+    }
+
+@router.get("/jobs/{job_id}/events")
+async def export_job_events(job_id: str):
+    """订阅导出任务进度，每次状态变化返回一行 JSON，任务结束后关闭"""
+    job = get_job(job_id)
+    
+    async def generate_events():
+        async for snapshot in job.events():
+            yield json.dumps(snapshot) + "\n"
+    
+    return StreamingResponse(
+        generate_events(),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(job_id: str, http_request: Request):
+    """下载已完成的导出任务"""
+    job = get_job(job_id)
+    if job.state != ExportJob.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"导出任务尚未完成（{job.state}）")
+    export_file = await _job_queue.download_path(job)
+    if export_file is None:
+        raise HTTPException(status_code=404, detail="导出音频已过期，请重新导出")
+    
+    etag = f'"{job.key}"'
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(
+        export_file,
+        media_type="audio/mpeg",
+        filename=job.filename,
+        headers={"ETag": etag, "X-Export-Id": job.key}
+    )
+
+@router.delete("/jobs/{job_id}")
+async def cancel_export_job(job_id: str):
+    """取消排队中或执行中的导出任务"""
+    job = get_job(job_id)
+    return {
+        "success": _job_queue.cancel(job.id),
+        "data": job.to_dict()
+    }
+
+@router.get("/exports/{key}")
+async def get_export(key: str, http_request: Request):
+    """按缓存键（批量导出响应中的 X-Export-Id）获取已导出的听写音频"""
+    if len(key) != 64 or any(char not in "0123456789abcdef" for char in key):
+        raise HTTPException(status_code=404, detail="导出音频不存在")
+    tts_service = get_tts_service("edge-tts")
+    export_file = await get_exporter(tts_service).cached_path(key)
+    if export_file is None:
+        raise HTTPException(status_code=404, detail="导出音频不存在或已过期")
+    
+    etag = f'"{key}"'
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(export_file, media_type="audio/mpeg", headers={"ETag": etag})
+
 @router.post("")
-async def generate_speech(request: TTSRequest):
+async def generate_speech(request: TTSRequest, http_request: Request):
     """生成语音"""
     try:
         # Web Speech API 在前端处理
@@ -330,6 +382,55 @@ async def generate_speech(request: TTSRequest):
             
         # 获取默认语音
         voice = request.voice or settings.TTS_ENGINES[request.engine]["default_voice"]
+        # 缓存键由文本、语音和语速决定，内容不会变化，可直接作为 ETag
+        etag = f'"{tts_service._get_cache_key(request.text, voice, request.rate)}"'
+        headers = {
+            "Content-Disposition": f'attachment; filename="{hash(request.text)}.mp3"',
+            "ETag": etag
+        }
+        
+        # 命中内存缓存：直接返回
+        audio_data = tts_service.get_memory_cached(request.text, voice, request.rate)
+        if audio_data is not None:
+            if http_request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return AudioResponse(content=audio_data, headers=headers)
+            
+        # 命中文件缓存：直接发送缓存文件，不经过内存拷贝
+        cached_file = await tts_service.get_cached_file(request.text, voice, request.rate)
+        if cached_file is not None:
+            if http_request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return FileResponse(cached_file, media_type="audio/mpeg", headers=headers)
+        
+        # 流式模式：音频块到达后立即转发给客户端（已有缓存时直接返回完整音频）
+        if request.stream and not tts_service.check_cache_exists(request.text, voice, request.rate):
+            audio_stream = tts_service.stream_audio(
+                request.text,
+                voice=voice,
+                rate=request.rate
+            )
+            # 先等待首个音频块，这样在开始响应前失败时仍能返回错误状态码
+            try:
+                first_chunk = await audio_stream.__anext__()
+            except StopAsyncIteration:
+                raise HTTPException(status_code=500, detail="生成语音失败")
+            
+            async def forward():
+                yield first_chunk
+                try:
+                    async for chunk in audio_stream:
+                        yield chunk
+                except Exception as e:
+                    logger.error(f"流式生成语音中断 ({request.text}): {str(e)}")
+                    # 响应头已发送，继续抛出让连接异常结束，客户端不会把不完整的音频当作成功
+                    raise
+            
+            return StreamingResponse(
+                forward(),
+                media_type="audio/mpeg",
+                headers=headers
+            )
         
         # 生成音频
         audio_data = await tts_service.generate_audio(
@@ -341,21 +442,35 @@ async def generate_speech(request: TTSRequest):
         if audio_data is None:
             raise HTTPException(status_code=500, detail="生成语音失败")
             
-        # 返回音频流
-        return StreamingResponse(
-            iter([audio_data]),
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": f'attachment; filename="{hash(request.text)}.mp3"'
-            }
-        )
+        # 返回音频数据
+        return AudioResponse(content=audio_data, headers=headers)
         
+    except HTTPException:
+        raise
+    except CircuitOpenError as e:
+        # 上游熔断期间快速失败，前端可据此降级到 Web Speech API
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/voices")
-async def get_voices(engine: str = "edge-tts"):
-    """获取可用的语音列表"""
+async def get_voices(
+    engine: str = "edge-tts",
+    locale: Optional[str] = None,
+    gender: Optional[str] = None
+):
+    """
+    获取可用的语音列表
+    
+    Args:
+        engine: TTS引擎
+        locale: 语言区域过滤，多个用逗号分隔（如 zh-CN,en-US）
+        gender: 性别过滤（Female 或 Male）
+    """
     try:
         # Web Speech API 在前端处理
         if engine == "web-speech":
@@ -368,7 +483,8 @@ async def get_voices(engine: str = "edge-tts"):
         if tts_service is None:
             raise HTTPException(status_code=400, detail="不支持的TTS引擎")
             
-        voices = await tts_service.get_available_voices()
+        locales = [item.strip() for item in locale.split(",") if item.strip()] if locale else None
+        voices = await tts_service.get_available_voices(locales=locales, gender=gender)
         return {
             "success": True,
             "data": voices
@@ -390,37 +506,57 @@ async def get_config():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/prewarm/{action}")
+async def control_prewarm(action: str):
+    """控制课程音频预生成：start / pause / resume"""
+    prewarmer = get_prewarmer()
+    if prewarmer is None:
+        raise HTTPException(status_code=400, detail="Edge TTS 未启用，无法预生成音频")
+    
+    if action == "start":
+        changed = prewarmer.start()
+    elif action == "pause":
+        changed = prewarmer.pause()
+    elif action == "resume":
+        changed = prewarmer.resume()
+    else:
+        raise HTTPException(status_code=404, detail=f"不支持的操作: {action}")
+    
+    return {
+        "success": changed,
+        "data": prewarmer.get_stats()
+    }
+
 @router.post("/check-cache")
 async def check_cache(request: CheckCacheRequest):
     """检查并准备缓存"""
     try:
         tts = get_tts_service(request.engine)
         failed_words = []
-        progress = 0
-        total = len(request.words)
+        words = list(dict.fromkeys(request.words))  # 去重，保持顺序
+        total = len(words)
+        
+        # 通过缓存索引筛选出尚未缓存的词语，无需访问文件系统
+        missing_words = [
+            word for word in words
+            if not tts.check_cache_exists(word, request.voice, request.rate)
+        ]
+        progress = total - len(missing_words)
         
         async def generate_progress():
             nonlocal progress, failed_words
             
-            # 使用批量生成方法，每批5个
-            chunk_size = 5
-            for i in range(0, total, chunk_size):
-                chunk = request.words[i:i + chunk_size]
-                
-                # 处理当前批次
-                results = await tts.generate_audio_batch(
-                    texts=chunk,
-                    voice=request.voice,
-                    rate=request.rate,
-                    chunk_size=chunk_size
-                )
-                
-                # 更新进度
-                for text, audio in results.items():
-                    if audio is None:
-                        failed_words.append(text)
-                    else:
-                        progress += 1
+            # 滑动窗口并发生成，每完成一个词语就返回一次进度
+            async for text, audio in tts.iter_audio_batch(
+                texts=missing_words,
+                voice=request.voice,
+                rate=request.rate,
+                priority=Priority.PRECHECK
+            ):
+                if audio is None:
+                    failed_words.append(text)
+                else:
+                    progress += 1
                 
                 # 返回当前进度
                 progress_data = {
@@ -448,6 +584,41 @@ async def check_cache(request: CheckCacheRequest):
         logger.error(f"检查缓存失败: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+_exporter: Optional[DictationExporter] = None
+
+def get_exporter(tts_service) -> DictationExporter:
+    """获取听写音频导出服务（进程内共享，导出缓存和进行中的导出在各请求之间复用）"""
+    global _exporter
+    if _exporter is None:
+        _exporter = DictationExporter(
+            tts_service,
+            JOBS_DIR,
+            EXPORTS_DIR,
+            START_PROMPT_FILE,
+            END_PROMPT_FILE,
+            settings
+        )
+    return _exporter
+
+_job_queue: Optional[ExportJobQueue] = None
+
+def get_job_queue(tts_service) -> ExportJobQueue:
+    """获取后台导出任务队列（进程内共享）"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = ExportJobQueue(
+            get_exporter(tts_service),
+            max_workers=settings.EXPORT_JOB_MAX_WORKERS,
+            max_queued=settings.EXPORT_JOB_MAX_QUEUED,
+            job_ttl=settings.EXPORT_JOB_TTL
+        )
+    return _job_queue
+
+async def stop_job_queue():
+    """停止后台导出任务（应用关闭时调用）"""
+    if _job_queue is not None:
+        await _job_queue.stop()
+
 def get_tts_service(engine: str):
     """获取TTS服务实例"""
     # Web Speech API 在前端处理
@@ -24,11 +24,55 @@ class Settings(BaseSettings):
         }
     }
     
+    # TTS缓存配置
+    TTS_MEMORY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 内存音频缓存上限（64MB）
+    TTS_DISK_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 文件缓存上限（1GB），0 表示不限制
+    TTS_CACHE_GC_INTERVAL: int = 600  # 文件缓存垃圾回收间隔（秒）
+    TTS_CACHE_TEMP_MAX_AGE: int = 3600  # 超过该时长（秒）的临时文件视为遗留文件
+    TTS_CACHE_BACKEND: str = "files"  # 文件缓存存储方式：files（每个词语一个MP3）或 pack（打包分段文件）
+    TTS_PACK_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024  # 打包存储单个分段文件的大小上限
+    
+    # Edge TTS 上游调用配置
+    TTS_UPSTREAM_INITIAL_CONCURRENCY: int = 5  # 初始并发数
+    TTS_UPSTREAM_MAX_CONCURRENCY: int = 10  # 自适应并发数上限
+    TTS_UPSTREAM_LATENCY_TARGET: float = 5.0  # 目标延迟（秒），超过时降低并发
+    TTS_MAX_RETRY_DELAY: float = 8.0  # 单次重试等待的上限（秒）
+    TTS_BREAKER_FAILURE_THRESHOLD: int = 5  # 连续失败多少次后熔断
+    TTS_BREAKER_RESET_TIMEOUT: float = 30.0  # 熔断持续时间（秒）
+    # 各类后台请求最多占用的并发上限比例，剩余部分留给实时播放（interactive）
+    TTS_UPSTREAM_CLASS_SHARES: Dict[str, float] = {
+        "precheck": 0.8,  # 听写开始前的缓存预检
+        "batch": 0.5,  # 导出完整听写 MP3
+        "warmup": 0.3  # 后台预生成
+    }
+    TTS_VOICES_CACHE_TTL: int = 3600  # 语音列表缓存有效期（秒），过期后在后台刷新
+    TTS_LESSON_SYNTHESIS: bool = False  # 批量生成时把多个词语拼成一句话合成，再按词语边界切分
+    TTS_LESSON_MAX_WORDS: int = 40  # 整课合成时每次请求最多包含的词语数
+    EDGE_TTS_WSS_URL: str = ""  # 覆盖 Edge TTS 的 WebSocket 地址（例如本地模拟服务），为空时使用默认地址
+    
+    # 课程音频预生成配置
+    TTS_PREWARM_ENABLED: bool = False  # 启动时是否自动在后台预生成所有课程的音频
+    TTS_PREWARM_VOICES: List[str] = []  # 预生成使用的语音，为空时使用 TTS_ENGINES 中的默认语音
+    TTS_PREWARM_RATES: List[float] = []  # 预生成使用的语速，为空时使用 TTS_ENGINES 中的默认语速
+    TTS_PREWARM_CONCURRENCY: int = 1  # 预生成同时进行的请求数
+    
+    # 音频导出配置
+    AUDIO_CONCAT_ENGINE: str = "python"  # 批量导出的拼接方式：python（进程内按帧拼接）或 ffmpeg
+    TRANSCODE_MAX_WORKERS: int = 2  # 同时运行的 FFmpeg 进程数上限
+    TRANSCODE_TIMEOUT: float = 120.0  # 单个 FFmpeg 进程的最长运行时间（秒）
+    TTS_EXPORT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 已导出听写音频的缓存上限（512MB），0 表示不限制
+    EXPORT_JOB_MAX_WORKERS: int = 2  # 同时执行的后台导出任务数
+    EXPORT_JOB_MAX_QUEUED: int = 20  # 排队等待的后台导出任务数上限，超出时拒绝提交
+    EXPORT_JOB_TTL: int = 3600  # 结束的后台导出任务保留时长（秒），过期后无法再查询和下载
+    
     # 听写配置
     SHOW_WORD: bool = False  # 是否在前端显示当前听写的词语
     
     # 文件配置
     WORDS_FILE: Path = Path("data/words.xlsx")
+    WORDS_SNAPSHOT: bool = True  # 通过编译后的快照（词语文件旁的 .snapshot.sqlite）加载课程，词语文件变化时自动重建
+    WORDS_RELOAD_INTERVAL: float = 2.0  # 检查词语文件变化的间隔（秒），变化后在后台重新加载课程，0 表示不检查
+    WORDS_COMPACT_DELAY: float = 5.0  # 课程修改先写入变更日志，等待多久（秒）后批量写回词语文件
     
     class Config:
         env_file = ".env" 
\ No newline at end of file
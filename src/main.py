@@ -1,12 +1,17 @@
 '''
 Description: 
 '''
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .config.settings import Settings
 from .middleware.concurrency import ConcurrencyMiddleware
 from .api.endpoints import dict, tts
+from .services.tts.factory import TTSFactory
+from .services.tts.prewarmer import get_prewarmer
+from .services.transcode import get_transcode_pool
+from .services.file_service import get_file_service
 
 # 加载配置
 settings = Settings()
@@ -44,12 +49,58 @@ async def startup_event():
     """应用启动时的初始化"""
     # 初始化TTS缓存文件
     await tts.init_cache_files()
+    
+    # 在线程中加载课程索引，之后由后台任务监视词语文件的变化
+    file_service = get_file_service()
+    try:
+        await asyncio.to_thread(file_service.reload)
+    except Exception as e:
+        print(f"加载课程失败: {str(e)}")
+    file_service.start_watching(settings.WORDS_RELOAD_INTERVAL)
+    
+    # 启动TTS文件缓存的后台垃圾回收
+    tts_service = TTSFactory.get_tts_service(settings.DEFAULT_ENGINE)
+    if tts_service is not None:
+        tts_service.start_cache_gc()
+        # 语音列表缺失或过期时在后台刷新，不阻塞启动
+        tts_service.start_voices_refresh()
+        
+        # 在后台预生成所有课程的音频，优先级低于实时请求
+        if settings.TTS_PREWARM_ENABLED:
+            prewarmer = get_prewarmer()
+            if prewarmer is not None:
+                prewarmer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时停止后台任务"""
+    file_service = get_file_service()
+    await file_service.stop_watching()
+    await file_service.flush_changes()
+    tts_service = TTSFactory.get_tts_service(settings.DEFAULT_ENGINE)
+    if tts_service is not None:
+        # Edge TTS 未启用时没有预生成任务
+        prewarmer = get_prewarmer()
+        if prewarmer is not None:
+            await prewarmer.stop()
+        await tts.stop_job_queue()
+        await tts_service.stop_cache_gc()
 
 @app.get("/api/status")
 async def get_status():
     """获取系统状态"""
     try:
         status = await concurrency_middleware.get_status()
+        status["lessons"] = get_file_service().get_stats()
+        tts_service = TTSFactory.get_tts_service(settings.DEFAULT_ENGINE)
+        if tts_service is not None:
+            status["tts"] = tts_service.get_stats()
+            prewarmer = get_prewarmer()
+            if prewarmer is not None:
+                status["prewarm"] = prewarmer.get_stats()
+            status["exports"] = tts.get_exporter(tts_service).get_stats()
+            status["exportJobs"] = tts.get_job_queue(tts_service).get_stats()
+        status["transcode"] = get_transcode_pool().get_stats()
         return {
             "success": True,
             "data": status
@@ -1,51 +1,147 @@
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Optional
+import os
 import time
+import uuid
+import asyncio
+import threading
+from .lesson_catalog import LessonCatalog, LessonKey
+from .lesson_changes import ChangeLog, apply_changes, read_changes
+from .lesson_snapshot import load_catalog
+from ..config.settings import Settings
+
+# 课程加载失败时返回的空索引
+EMPTY_CATALOG = LessonCatalog([])
+
 
 class FileService:
-    def __init__(self, excel_path: Path):
+    def __init__(self, excel_path: Path, use_snapshot: bool = True, compact_delay: float = 5.0):
         """
         初始化文件服务
         
         Args:
-            excel_path: Excel文件路径
+            excel_path: Excel文件路径（编辑用的源文件）
+            use_snapshot: 是否通过编译后的快照加载课程，Excel 文件变化时自动重建快照
+            compact_delay: 课程修改写入变更日志后，等待多久（秒）批量写回 Excel 文件
         """
         self.excel_path = excel_path
+        self._use_snapshot = use_snapshot
+        self._compact_delay = compact_delay
         if not self.excel_path.exists():
             raise FileNotFoundError(f"词语文件不存在: {self.excel_path}")
         
-        self._df_cache = None  # DataFrame 缓存
-        self._df_cache_time = 0  # 缓存时间
-        self._df_cache_ttl = 60  # 缓存有效期（1分钟）
-        self._lessons_cache = None  # 课程列表缓存
-        self._lessons_cache_time = 0  # 课程列表缓存时间
-        
-    def _read_excel(self) -> pd.DataFrame:
-        """读取 Excel 文件并缓存"""
-        current_time = time.time()
-        
-        # 检查文件是否被修改
-        file_mtime = self.excel_path.stat().st_mtime
-        
-        # 如果缓存有效且文件未修改，返回缓存的数据
-        if (self._df_cache is not None and 
-            current_time - self._df_cache_time < self._df_cache_ttl and
-            file_mtime <= self._df_cache_time):
-            print("使用缓存的 DataFrame")
-            return self._df_cache
-            
-        # 读取新数据
-        print(f"正在读取Excel文件: {self.excel_path}")
+        self._catalog: Optional[LessonCatalog] = None  # 课程索引
+        self._catalog_mtime = None  # 构建索引时词语文件的修改时间
+        self._failed_mtime = None  # 上次加载失败时词语文件的修改时间，文件再次变化前不重试
+        self._lock = threading.Lock()  # 避免多个线程同时重建索引
+        self._watch_task: Optional[asyncio.Task] = None  # 监视词语文件变化的后台任务
+        self._changes = ChangeLog(excel_path.with_suffix(".changes.jsonl"))  # 尚未写回 Excel 文件的课程修改
+        self._compact_lock = threading.Lock()  # 同一时间只有一次写回
+        self._compact_task: Optional[asyncio.Task] = None  # 延迟写回任务
+        
+        # 统计
+        self.reloads = 0
+        self.loaded_at: Optional[float] = None
+        self.last_load_duration = 0.0
+        self.last_error: Optional[str] = None
+        
+    @property
+    def catalog(self) -> LessonCatalog:
+        """
+        当前的课程索引
+        
+        只返回内存中的版本，不检查文件变化（由后台任务负责），请求不会等待重新加载；
+        尚未加载时（例如未启动后台任务的脚本）在当前线程加载一次。
+        加载失败后返回空索引，由后台任务在文件变化时重试，不在请求中反复解析文件。
+        """
+        catalog = self._catalog
+        if catalog is None:
+            if self._failed_mtime is not None:
+                return EMPTY_CATALOG
+            with self._lock:
+                if self._catalog is None and self._failed_mtime is None:
+                    self._load()
+                catalog = self._catalog
+        return catalog if catalog is not None else EMPTY_CATALOG
+        
+    def reload(self) -> LessonCatalog:
+        """重新加载课程索引并整体替换（同步，需在线程中调用）"""
+        with self._lock:
+            self._load()
+            return self._catalog
+        
+    def _load(self) -> None:
+        """构建新的课程索引，调用方需持有锁"""
+        # 在读取前记录修改时间，读取期间文件再次变化时下一次检查会重新加载
+        file_mtime = self.excel_path.stat().st_mtime_ns
         start_time = time.time()
-        df = pd.read_excel(self.excel_path)
+        try:
+            if self._use_snapshot:
+                catalog = load_catalog(self.excel_path)
+            else:
+                print(f"正在读取Excel文件: {self.excel_path}")
+                catalog = LessonCatalog.from_dataframe(pd.read_excel(self.excel_path))
+            # 重放尚未写回 Excel 文件的修改
+            pending = self._changes.pending()
+            if pending:
+                catalog = catalog.replace(pending)
+        except Exception as e:
+            self._failed_mtime = file_mtime
+            self.last_error = str(e)
+            raise
+        self._catalog = catalog
+        self._catalog_mtime = file_mtime
+        self._failed_mtime = None
+        self.last_error = None
+        self.reloads += 1
+        self.loaded_at = time.time()
+        self.last_load_duration = self.loaded_at - start_time
+        print(f"课程索引构建完成，总共 {len(catalog)} 个课程，耗时: {self.last_load_duration:.2f}秒")
         
-        # 更新缓存
-        self._df_cache = df
-        self._df_cache_time = current_time
+    def start_watching(self, interval: float) -> None:
+        """启动后台任务，定期检查词语文件，发生变化时在线程中重新加载"""
+        if self._changes.has_pending():
+            # 上次运行遗留的修改
+            self._schedule_compaction()
+        if interval <= 0 or (self._watch_task is not None and not self._watch_task.done()):
+            return
+        self._watch_task = asyncio.create_task(self._watch_loop(interval))
         
-        print(f"Excel文件读取完成，耗时: {(time.time() - start_time):.2f}秒")
-        return df
+    async def stop_watching(self) -> None:
+        """停止监视词语文件"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+            
+    async def _watch_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                file_mtime = self.excel_path.stat().st_mtime_ns
+                if file_mtime != self._catalog_mtime and file_mtime != self._failed_mtime:
+                    print(f"词语文件已修改，重新加载课程: {self.excel_path}")
+                    await asyncio.to_thread(self.reload)
+            except Exception as e:
+                # 保留旧的索引，文件再次变化时重试
+                print(f"重新加载课程失败: {str(e)}")
+                
+    def get_stats(self) -> Dict:
+        """获取课程索引的加载状态"""
+        catalog = self._catalog
+        return {
+            "lessons": len(catalog) if catalog is not None else 0,
+            "watching": self._watch_task is not None and not self._watch_task.done(),
+            "reloads": self.reloads,
+            "loadedAt": self.loaded_at,
+            "lastLoadDuration": round(self.last_load_duration, 3),
+            "lastError": self.last_error,
+            "pendingChanges": self._changes.has_pending()
+        }
                 
     def read_lessons(self) -> List[Dict]:
         """
@@ -55,49 +151,15 @@ class FileService:
             课程列表，每个课程包含年级、课时和单词数量
         """
         try:
-            current_time = time.time()
-            
-            # 检查缓存是否有效
-            if (self._lessons_cache is not None and 
-                current_time - self._lessons_cache_time < self._df_cache_ttl):
-                print("使用缓存的课程列表")
-                return self._lessons_cache
-                
-            print("开始处理课程数据...")
-            start_time = time.time()
-            
-            df = self._read_excel()
-            lessons = []
-            
-            for (grade, lesson), group in df.groupby(['年级', '课时']):
-                # 获取该课程的所有单词
-                words = []
-                for word_list in group['词语'].dropna():  # 忽略空值
-                    if isinstance(word_list, str):  # 确保是字符串
-                        words.extend([w.strip() for w in word_list.split(',')])
-                
-                lesson_info = {
-                    'grade': str(grade).strip(),  # 确保是字符串并去除空白
-                    'lesson': str(lesson).strip(),  # 确保是字符串并去除空白
-                    'wordCount': len(words)
-                }
-                lessons.append(lesson_info)
-                
-            # 更新缓存
-            self._lessons_cache = lessons
-            self._lessons_cache_time = current_time
-            
-            print(f"课程数据处理完成，总共 {len(lessons)} 个课程，耗时: {(time.time() - start_time):.2f}秒")
-            return lessons
-            
+            return self.catalog.lessons()
         except Exception as e:
             print(f"读取课程信息失败: {str(e)}")
             import traceback
             traceback.print_exc()
-            # 如果有缓存，在出错时返回缓存的数据
-            if self._lessons_cache is not None:
+            # 如果已有索引，在出错时返回旧的数据
+            if self._catalog is not None:
                 print("使用缓存的课程列表（出错回退）")
-                return self._lessons_cache
+                return self._catalog.lessons()
             return []
             
     def get_words(self, grade: str, lesson: str) -> Optional[List[str]]:
@@ -109,42 +171,88 @@ class FileService:
             lesson: 课时
             
         Returns:
-            单词列表
+            去重排序后的单词列表，课程不存在时返回 None
         """
         try:
-            df = self._read_excel()  # 使用缓存的 DataFrame
-            
-            # 确保进行比较的值类型一致
-            df['年级'] = df['年级'].astype(str).str.strip()
-            df['课时'] = df['课时'].astype(str).str.strip()
-            grade = str(grade).strip()
-            lesson = str(lesson).strip()
+            words = self.catalog.get_words(grade, lesson)
+        except Exception as e:
+            print(f"获取单词列表失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            if self._catalog is None:
+                return None
+            words = self._catalog.get_words(grade, lesson)
             
-            filtered = df[(df['年级'] == grade) & (df['课时'] == lesson)]
+        if words is None:
+            print(f"未找到课程: {grade} - {lesson}")
+            return None
+        return list(words)
             
-            if filtered.empty:
-                print(f"未找到课程: {grade} - {lesson}")
-                return None
-                
-            # 合并所有单词并去重
-            words = set()
-            for word_list in filtered['词语'].dropna():
-                if isinstance(word_list, str):
-                    words.update([w.strip() for w in word_list.split(',')])
-                
-            result = sorted(list(words))
-            print(f"找到单词: {result}")
-            return result
+    def get_words_bulk(self, keys: List[LessonKey]) -> List[Dict]:
+        """
+        批量获取多个课程的单词列表（使用同一版本的索引）
+        
+        Args:
+            keys: (年级, 课时) 列表
             
+        Returns:
+            每个课程的年级、课时和去重排序后的单词，课程不存在时单词为 None
+        """
+        try:
+            catalog = self.catalog
         except Exception as e:
-            print(f"获取单词列表失败: {str(e)}")
+            print(f"批量获取单词列表失败: {str(e)}")
             import traceback
             traceback.print_exc()
-            return None
+            # 如果已有索引，在出错时使用旧的数据
+            catalog = self._catalog if self._catalog is not None else EMPTY_CATALOG
+        result = []
+        for grade, lesson in keys:
+            words = catalog.get_words(grade, lesson)
+            result.append({
+                'grade': grade,
+                'lesson': lesson,
+                'words': list(words) if words is not None else None
+            })
+        return result
+        
+    def search_words(self, query: str, mode: str = "exact", limit: int = 50) -> List[Dict]:
+        """
+        按词语查找课程
+        
+        Args:
+            query: 查询内容
+            mode: exact、prefix 或 char（包含查询中的每一个字）
+            limit: 最多返回的词语数
+            
+        Returns:
+            匹配的词语及包含它的课程列表
             
-    def add_words(self, grade: str, lesson: str, words: List[str]) -> bool:
+        Raises:
+            ValueError: 不支持的查找方式
         """
-        添加单词到指定课程
+        try:
+            catalog = self.catalog
+        except Exception as e:
+            print(f"查找词语失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            # 如果已有索引，在出错时使用旧的数据
+            catalog = self._catalog if self._catalog is not None else EMPTY_CATALOG
+        return [
+            {
+                'word': word,
+                'lessons': [{'grade': grade, 'lesson': lesson} for grade, lesson in keys]
+            }
+            for word, keys in catalog.search(query, mode, limit)
+        ]
+        
+    async def add_words(self, grade: str, lesson: str, words: List[str]) -> bool:
+        """
+        添加单词到指定课程（替换该课程原有的单词）
+        
+        修改先写入变更日志并立即应用到内存中的课程索引，
+        Excel 文件由后台任务延迟批量写回，多次修改只写一次文件。
         
         Args:
             grade: 年级
@@ -155,34 +263,97 @@ class FileService:
             是否添加成功
         """
         try:
-            df = pd.read_excel(self.excel_path)
-            # 确保进行比较的值类型一致
-            df['年级'] = df['年级'].astype(str).str.strip()
-            df['课时'] = df['课时'].astype(str).str.strip()
-            grade = str(grade).strip()
-            lesson = str(lesson).strip()
-            
-            # 检查是否已存在相同的课程
-            mask = (df['年级'] == grade) & (df['课时'] == lesson)
-            if mask.any():
-                # 更新现有记录
-                df.loc[mask, '词语'] = ','.join(words)
-            else:
-                # 添加新记录
-                new_row = pd.DataFrame({
-                    '年级': [grade],
-                    '课时': [lesson],
-                    '词语': [','.join(words)]
-                })
-                df = pd.concat([df, new_row], ignore_index=True)
-                
-            # 保存到文件
-            with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            return True
-            
+            await asyncio.to_thread(self._record_change, (str(grade).strip(), str(lesson).strip()), words)
         except Exception as e:
             print(f"添加单词失败: {str(e)}")
             import traceback
             traceback.print_exc()  # 打印详细错误信息
-            return False 
\ No newline at end of file
+            return False
+        self._schedule_compaction()
+        return True
+        
+    def _record_change(self, key: LessonKey, words: List[str]) -> None:
+        """写入变更日志并替换内存中的索引（同步，需在线程中调用）"""
+        with self._lock:
+            if self._catalog is None:
+                self._load()
+            self._changes.append(key, words)
+            self._catalog = self._catalog.replace([(key, words)])
+            
+    def _schedule_compaction(self) -> None:
+        """安排一次延迟写回，已安排时不重复"""
+        if self._compact_task is None or self._compact_task.done():
+            self._compact_task = asyncio.create_task(self._compact_later())
+            
+    async def _compact_later(self) -> None:
+        # 写回期间到达的修改不会另外安排写回，写回后日志中仍有修改时继续
+        while True:
+            # 等待一段时间，把这期间的修改合并为一次写入
+            await asyncio.sleep(self._compact_delay)
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                # 修改仍保留在变更日志中，下次修改或重启时重试
+                print(f"写回词语文件失败: {str(e)}")
+                return
+            if not self._changes.has_pending():
+                return
+            
+    def compact(self) -> int:
+        """
+        把变更日志中的修改写回 Excel 文件（同步，需在线程中调用）
+        
+        先写入同目录下的临时文件再原子替换，写回期间的新修改进入新的日志，不会丢失。
+        
+        Returns:
+            写回的修改数
+        """
+        with self._compact_lock:
+            with self._lock:
+                compacting = self._changes.rotate()
+            if compacting is None:
+                return 0
+            changes = read_changes(compacting)
+            
+            start_time = time.time()
+            df = apply_changes(pd.read_excel(self.excel_path), changes)
+            temp_file = self.excel_path.with_name(f".{self.excel_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                with pd.ExcelWriter(temp_file, engine='openpyxl') as writer:
+                    df.to_excel(writer, index=False)
+                os.replace(temp_file, self.excel_path)
+            finally:
+                temp_file.unlink(missing_ok=True)
+            # 写回完成后才删除，中途退出时这些修改会在下次加载时重放
+            compacting.unlink()
+            print(f"已将 {len(changes)} 条课程修改写回词语文件，耗时: {(time.time() - start_time):.2f}秒")
+            return len(changes)
+            
+    async def flush_changes(self) -> None:
+        """立即写回所有未写回的修改（应用关闭时调用）"""
+        if self._compact_task is not None and not self._compact_task.done():
+            self._compact_task.cancel()
+            try:
+                await self._compact_task
+            except asyncio.CancelledError:
+                pass
+        self._compact_task = None
+        try:
+            await asyncio.to_thread(self.compact)
+        except Exception as e:
+            print(f"写回词语文件失败: {str(e)}")
+
+_file_service: Optional[FileService] = None
+
+
+def get_file_service() -> FileService:
+    """获取进程内共享的文件服务，课程索引在各请求之间复用"""
+    global _file_service
+    if _file_service is None:
+        settings = Settings()
+        _file_service = FileService(
+            settings.WORDS_FILE,
+            use_snapshot=settings.WORDS_SNAPSHOT,
+            compact_delay=settings.WORDS_COMPACT_DELAY
+        )
+    return _file_service
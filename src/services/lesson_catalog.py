@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import pandas as pd
+
+# 课程键：(年级, 课时)
+LessonKey = Tuple[str, str]
+
+
+def split_words(word_lists: Iterable[str]) -> List[str]:
+    """
+    拆分词语：每一项可包含多个以英文逗号分隔的词语，去掉首尾空白和空项
+
+    词语表和课程修改都按同样的规则处理，保证修改后与重新加载后得到的词语一致。
+    """
+    words = []
+    for word_list in word_lists:
+        if isinstance(word_list, str):  # 确保是字符串
+            words.extend(word for word in (w.strip() for w in word_list.split(',')) if word)
+    return words
+
+
+class LessonCatalog:
+    """
+    不可变的课程索引
+
+    由词语表构建一次，之后只读：(年级, 课时) -> 去重排序后的词语，查询为 O(1)。
+    同时构建倒排索引（词语 -> 课程，单字 -> 词语），用于按词语查找课程。
+    词语表变化时构建新的索引整体替换，正在使用旧索引的请求不受影响。
+    """
+
+    SEARCH_MODES = ("exact", "prefix", "char")
+
+    def __init__(self, lessons: Iterable[Tuple[LessonKey, Iterable[str]]]):
+        """
+        Args:
+            lessons: 按课程顺序排列的 ((年级, 课时), 词语) 列表，同一课程出现多次时合并
+        """
+        merged: Dict[LessonKey, set] = {}
+        for key, words in lessons:
+            merged.setdefault(key, set()).update(word for word in words if word)
+        self._words: Mapping[LessonKey, Tuple[str, ...]] = MappingProxyType({
+            key: tuple(sorted(words)) for key, words in merged.items()
+        })
+        self._summary: Tuple[Tuple[str, str, int], ...] = tuple(
+            (grade, lesson, len(words)) for (grade, lesson), words in self._words.items()
+        )
+
+        # 倒排索引：词语 -> 包含该词语的课程（按课程顺序）
+        lessons_by_word: Dict[str, List[LessonKey]] = {}
+        for key, words in self._words.items():
+            for word in words:
+                lessons_by_word.setdefault(word, []).append(key)
+        self._lessons_by_word: Mapping[str, Tuple[LessonKey, ...]] = MappingProxyType({
+            word: tuple(keys) for word, keys in lessons_by_word.items()
+        })
+        # 排序后的词语，用于前缀查找
+        self._sorted_words: Tuple[str, ...] = tuple(sorted(lessons_by_word))
+        # 单字 -> 包含该字的词语，用于按字查找中文词语
+        words_by_char: Dict[str, set] = {}
+        for word in self._sorted_words:
+            for char in set(word):
+                words_by_char.setdefault(char, set()).add(word)
+        self._words_by_char: Mapping[str, frozenset] = MappingProxyType({
+            char: frozenset(words) for char, words in words_by_char.items()
+        })
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "LessonCatalog":
+        """
+        从词语表构建索引
+
+        Args:
+            df: 包含 年级、课时、词语 三列的表格，词语以英文逗号分隔
+        """
+        lessons = []
+        for (grade, lesson), group in df.groupby(['年级', '课时']):
+            words = split_words(group['词语'].dropna())  # 忽略空值
+            lessons.append(((str(grade).strip(), str(lesson).strip()), words))
+        return cls(lessons)
+
+    def replace(self, changes: Iterable[Tuple[LessonKey, Iterable[str]]]) -> "LessonCatalog":
+        """
+        返回替换了指定课程词语的新索引，原索引不变
+
+        Args:
+            changes: ((年级, 课时), 词语) 列表，不存在的课程追加到末尾；词语按 split_words 的规则拆分
+        """
+        lessons = dict(self._words)
+        for (grade, lesson), words in changes:
+            lessons[(str(grade).strip(), str(lesson).strip())] = split_words(words)
+        return LessonCatalog(lessons.items())
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def items(self) -> Iterable[Tuple[LessonKey, Tuple[str, ...]]]:
+        """按课程顺序返回 ((年级, 课时), 词语)"""
+        return self._words.items()
+
+    def lessons(self) -> List[Dict]:
+        """
+        所有课程信息
+
+        Returns:
+            课程列表，每个课程包含年级、课时和单词数量
+        """
+        return [
+            {'grade': grade, 'lesson': lesson, 'wordCount': count}
+            for grade, lesson, count in self._summary
+        ]
+
+    def get_words(self, grade: str, lesson: str) -> Optional[Tuple[str, ...]]:
+        """
+        获取指定课程的单词
+
+        Returns:
+            去重排序后的单词，课程不存在时返回 None
+        """
+        return self._words.get((str(grade).strip(), str(lesson).strip()))
+
+    def search(self, query: str, mode: str = "exact", limit: int = 50) -> List[Tuple[str, Tuple[LessonKey, ...]]]:
+        """
+        按词语查找课程
+
+        Args:
+            query: 查询内容
+            mode: exact（词语完全相同）、prefix（以查询内容开头）、char（包含查询中的每一个字）
+            limit: 最多返回的词语数
+
+        Returns:
+            (词语, 包含该词语的课程) 列表；前缀查找按词语排序，按字查找时较短的词语在前
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        if mode == "exact":
+            words = [query] if query in self._lessons_by_word else []
+        elif mode == "prefix":
+            words = []
+            index = bisect_left(self._sorted_words, query)
+            while index < len(self._sorted_words) and len(words) < limit:
+                word = self._sorted_words[index]
+                if not word.startswith(query):
+                    break
+                words.append(word)
+                index += 1
+        elif mode == "char":
+            # 从包含词语最少的字开始求交集
+            candidates = sorted(
+                (self._words_by_char.get(char, frozenset()) for char in set(query) if not char.isspace()),
+                key=len
+            )
+            matched = set(candidates[0]) if candidates else set()
+            for words_with_char in candidates[1:]:
+                matched &= words_with_char
+            words = sorted(matched, key=lambda word: (len(word), word))[:limit]
+        else:
+            raise ValueError(f"不支持的查找方式: {mode}")
+        return [(word, self._lessons_by_word[word]) for word in words]
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+import pandas as pd
+from .lesson_catalog import LessonKey
+
+# 一条课程修改：((年级, 课时), 词语)
+LessonChange = Tuple[LessonKey, List[str]]
+
+
+class ChangeLog:
+    """
+    课程修改的追加写日志（JSON Lines，每行一次修改）
+
+    修改先追加到日志，之后由后台任务批量合并写回 Excel 文件。
+    合并开始时日志被整体重命名为 .compacting 文件，新的修改写入新的日志，
+    写回完成后删除 .compacting 文件；进程异常退出时两个文件中的修改在下次加载时重放。
+    所有方法都是同步的，调用方负责加锁。
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 日志文件路径
+        """
+        self.path = path
+        self.compacting_path = path.with_name(path.name + ".compacting")
+
+    def append(self, key: LessonKey, words: List[str]) -> None:
+        """追加一条修改并写入磁盘"""
+        entry = {"grade": key[0], "lesson": key[1], "words": words, "time": time.time()}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self) -> List[LessonChange]:
+        """尚未写回 Excel 文件的所有修改（按写入顺序）"""
+        return read_changes(self.compacting_path) + read_changes(self.path)
+
+    def has_pending(self) -> bool:
+        return self.compacting_path.exists() or self.path.exists()
+
+    def rotate(self) -> Optional[Path]:
+        """
+        开始一次合并：把日志移到 .compacting 文件
+
+        上次合并未完成时，把新的修改追加到遗留的 .compacting 文件之后。
+
+        Returns:
+            待合并的文件，没有待合并的修改时返回 None
+        """
+        if self.path.exists():
+            if self.compacting_path.exists():
+                with open(self.compacting_path, "a", encoding="utf-8") as target:
+                    target.write(self.path.read_text(encoding="utf-8"))
+                    target.flush()
+                    os.fsync(target.fileno())
+                self.path.unlink()
+            else:
+                os.replace(self.path, self.compacting_path)
+        return self.compacting_path if self.compacting_path.exists() else None
+
+
+def read_changes(path: Path) -> List[LessonChange]:
+    """读取日志文件中的修改，忽略写了一半的行"""
+    if not path.exists():
+        return []
+    changes = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                changes.append(((entry["grade"], entry["lesson"]), entry["words"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return changes
+
+
+def apply_changes(df: pd.DataFrame, changes: List[LessonChange]) -> pd.DataFrame:
+    """
+    把修改应用到词语表：已存在的课程替换词语，不存在的课程追加到末尾
+
+    Returns:
+        修改后的新表格
+    """
+    df = df.copy()
+    # 确保进行比较的值类型一致
+    df['年级'] = df['年级'].astype(str).str.strip()
+    df['课时'] = df['课时'].astype(str).str.strip()
+    for (grade, lesson), words in changes:
+        mask = (df['年级'] == grade) & (df['课时'] == lesson)
+        if mask.any():
+            # 更新现有记录
+            df.loc[mask, '词语'] = ','.join(words)
+        else:
+            # 添加新记录
+            new_row = pd.DataFrame({
+                '年级': [grade],
+                '课时': [lesson],
+                '词语': [','.join(words)]
+            })
+            df = pd.concat([df, new_row], ignore_index=True)
+    return df
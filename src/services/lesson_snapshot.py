@@ -0,0 +1,163 @@
+import os
+import time
+import uuid
+import sqlite3
+import hashlib
+import argparse
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Optional
+import pandas as pd
+from .lesson_catalog import LessonCatalog
+
+# 快照结构变化时递增，旧版本的快照会被重建
+SNAPSHOT_VERSION = 1
+
+# 词语之间的分隔符（词语本身不会包含换行）
+WORD_SEPARATOR = "\n"
+
+
+def snapshot_path(source: Path) -> Path:
+    """词语文件对应的快照路径（与词语文件放在同一目录）"""
+    return source.with_suffix(".snapshot.sqlite")
+
+
+def file_digest(path: Path) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_meta(target: Path) -> Optional[Dict[str, str]]:
+    """
+    读取快照的元数据
+
+    Returns:
+        元数据，快照不存在、已损坏或版本不一致时返回 None
+    """
+    if not target.exists():
+        return None
+    try:
+        with closing(sqlite3.connect(f"file:{target}?mode=ro", uri=True)) as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.Error:
+        return None
+    if meta.get("version") != str(SNAPSHOT_VERSION):
+        return None
+    return meta
+
+
+def read_catalog(target: Path) -> LessonCatalog:
+    """从快照读取课程索引"""
+    with closing(sqlite3.connect(f"file:{target}?mode=ro", uri=True)) as conn:
+        rows = conn.execute("SELECT grade, lesson, words FROM lessons ORDER BY id").fetchall()
+    return LessonCatalog(
+        ((grade, lesson), words.split(WORD_SEPARATOR) if words else [])
+        for grade, lesson, words in rows
+    )
+
+
+def write_snapshot(catalog: LessonCatalog, source: Path, target: Path, digest: str) -> None:
+    """
+    写入快照
+
+    先写入同目录下的临时文件再原子替换，读取方不会读到写了一半的快照。
+    """
+    stat = source.stat()
+    temp_file = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with closing(sqlite3.connect(temp_file)) as conn:
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE lessons (id INTEGER PRIMARY KEY, grade TEXT NOT NULL, lesson TEXT NOT NULL, words TEXT NOT NULL)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(SNAPSHOT_VERSION)),
+                ("source_mtime_ns", str(stat.st_mtime_ns)),
+                ("source_size", str(stat.st_size)),
+                ("source_sha256", digest),
+                ("created_at", str(time.time()))
+            ])
+            conn.executemany("INSERT INTO lessons (grade, lesson, words) VALUES (?, ?, ?)", [
+                (grade, lesson, WORD_SEPARATOR.join(words))
+                for (grade, lesson), words in catalog.items()
+            ])
+            conn.commit()
+        os.replace(temp_file, target)
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+
+def compile_snapshot(source: Path, target: Optional[Path] = None, digest: Optional[str] = None) -> LessonCatalog:
+    """
+    解析词语文件并生成快照
+
+    Args:
+        source: 词语 Excel 文件
+        target: 快照路径，默认与词语文件放在同一目录
+        digest: 已计算好的词语文件 SHA-256
+
+    Returns:
+        解析得到的课程索引
+    """
+    target = target or snapshot_path(source)
+    digest = digest or file_digest(source)
+    catalog = LessonCatalog.from_dataframe(pd.read_excel(source))
+    try:
+        write_snapshot(catalog, source, target, digest)
+    except (OSError, sqlite3.Error) as e:
+        # 目录只读等情况下仍可使用解析结果，只是下次启动需要重新解析
+        print(f"写入课程快照失败: {str(e)}")
+    return catalog
+
+
+def load_catalog(source: Path, target: Optional[Path] = None) -> LessonCatalog:
+    """
+    加载课程索引：快照有效时直接读取，否则解析词语文件并重建快照
+
+    词语文件的修改时间和大小与快照记录一致时视为未变化；不一致时再比较内容哈希，
+    内容相同（例如文件被复制或 touch）只更新快照记录的修改时间。
+
+    Args:
+        source: 词语 Excel 文件
+        target: 快照路径，默认与词语文件放在同一目录
+    """
+    target = target or snapshot_path(source)
+    stat = source.stat()
+    meta = read_meta(target)
+    digest = None
+    if meta is not None:
+        if meta.get("source_mtime_ns") == str(stat.st_mtime_ns) and meta.get("source_size") == str(stat.st_size):
+            return read_catalog(target)
+        digest = file_digest(source)
+        if meta.get("source_sha256") == digest:
+            catalog = read_catalog(target)
+            try:
+                with closing(sqlite3.connect(target)) as conn, conn:
+                    conn.executemany("UPDATE meta SET value = ? WHERE key = ?", [
+                        (str(stat.st_mtime_ns), "source_mtime_ns"),
+                        (str(stat.st_size), "source_size")
+                    ])
+            except sqlite3.Error as e:
+                print(f"更新课程快照失败: {str(e)}")
+            return catalog
+
+    print(f"课程快照不存在或已过期，重新解析: {source}")
+    return compile_snapshot(source, target, digest)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="将词语 Excel 文件编译为课程快照")
+    parser.add_argument("source", type=Path, help="词语 Excel 文件")
+    parser.add_argument("--output", type=Path, default=None, help="快照路径，默认与词语文件放在同一目录")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    target = args.output or snapshot_path(args.source)
+    catalog = compile_snapshot(args.source, target)
+    print(f"编译完成: {target}，共 {len(catalog)} 个课程，耗时: {(time.time() - start_time):.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import sys
+import time
+import asyncio
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+from ..config.settings import Settings
+
+
+class TranscodeTimeout(Exception):
+    """外部转码进程执行超时"""
+
+
+class TranscodePool:
+    """
+    外部转码进程（FFmpeg 等）的异步执行池
+
+    进程以异步子进程方式运行，不阻塞事件循环；同时运行的进程数有上限，其余请求排队。
+    超时或调用方取消（例如客户端断开连接）时终止进程。
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 120.0):
+        """
+        初始化执行池
+
+        Args:
+            max_workers: 同时运行的进程数上限
+            timeout: 单个进程的最长运行时间（秒）
+        """
+        self._max_workers = max(1, max_workers)
+        self._timeout = timeout
+        self._semaphore = asyncio.Semaphore(self._max_workers)
+        self._queued = 0
+        self._running = 0
+
+        # 统计
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_run_time = 0.0
+        self.max_run_time = 0.0
+        self.last_run_time = 0.0
+        self.max_wait_time = 0.0
+
+    async def run(self, cmd: List[str], timeout: Optional[float] = None) -> Tuple[int, bytes, bytes]:
+        """
+        执行外部命令
+
+        Args:
+            cmd: 命令及参数
+            timeout: 超时时间（秒），为 None 时使用默认值
+
+        Returns:
+            (返回码, 标准输出, 标准错误)
+
+        Raises:
+            TranscodeTimeout: 进程运行超时
+            asyncio.CancelledError: 调用方取消，进程已被终止
+        """
+        timeout = timeout or self._timeout
+        enqueue_time = time.monotonic()
+        self._queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+        self.max_wait_time = max(self.max_wait_time, time.monotonic() - enqueue_time)
+
+        self._running += 1
+        start_time = time.monotonic()
+        process = None
+        try:
+            kwargs = {}
+            if sys.platform == "win32":
+                # 在 Windows 上不弹出控制台窗口
+                kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **kwargs
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise TranscodeTimeout(f"转码进程运行超过 {timeout:.0f} 秒，已终止")
+
+            if process.returncode == 0:
+                self.completed += 1
+            else:
+                self.failed += 1
+            return process.returncode, stdout, stderr
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except TranscodeTimeout:
+            raise
+        except Exception:
+            # 进程无法启动等错误
+            self.failed += 1
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            run_time = time.monotonic() - start_time
+            self.last_run_time = run_time
+            self.total_run_time += run_time
+            self.max_run_time = max(self.max_run_time, run_time)
+            self._running -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行池统计信息"""
+        finished = self.completed + self.failed + self.timeouts + self.cancelled
+        return {
+            "maxWorkers": self._max_workers,
+            "running": self._running,
+            "queued": self._queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "avgRunTime": round(self.total_run_time / finished, 3) if finished else 0.0,
+            "maxRunTime": round(self.max_run_time, 3),
+            "lastRunTime": round(self.last_run_time, 3),
+            "maxWaitTime": round(self.max_wait_time, 3)
+        }
+
+
+_pool: Optional[TranscodePool] = None
+
+
+def get_transcode_pool() -> TranscodePool:
+    """获取进程内共享的转码执行池"""
+    global _pool
+    if _pool is None:
+        settings = Settings()
+        _pool = TranscodePool(settings.TRANSCODE_MAX_WORKERS, settings.TRANSCODE_TIMEOUT)
+    return _pool
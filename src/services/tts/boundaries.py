@@ -0,0 +1,103 @@
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+from .mp3 import iter_frames, slice_frames
+
+# WordBoundary 事件的时间单位是 100 纳秒
+TICKS_PER_SECOND = 10_000_000
+
+# 后一个词语未能对齐时，在当前词语结束后保留的时长（秒）
+TAIL_PADDING = 0.3
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白和标点，只保留用于对齐的文字"""
+    return "".join(
+        char for char in unicodedata.normalize("NFKC", text).lower()
+        if not unicodedata.category(char).startswith(("P", "Z", "C"))
+    )
+
+
+def align_words(
+    words: List[str],
+    boundaries: List[Tuple[int, int, str]]
+) -> List[Optional[Tuple[float, float]]]:
+    """
+    将 WordBoundary 事件按顺序对齐到词语
+
+    一个词语可能对应多个边界事件（例如中文被切成多个词），依次拼接事件文本直到与词语一致。
+    出现无法匹配的事件后停止对齐，之后的词语都视为未对齐。
+
+    Args:
+        words: 合成时拼接的词语列表
+        boundaries: (偏移, 时长, 文本) 列表，偏移和时长的单位为 100 纳秒
+
+    Returns:
+        每个词语的 (开始时间, 结束时间)（秒），未对齐的词语为 None
+    """
+    spans: List[Optional[Tuple[float, float]]] = [None] * len(words)
+    index = 0
+    for position, word in enumerate(words):
+        target = normalize_text(word)
+        if not target:
+            break
+        matched = ""
+        start = end = None
+        while index < len(boundaries) and len(matched) < len(target):
+            offset, duration, text = boundaries[index]
+            piece = normalize_text(text)
+            index += 1
+            if not piece:
+                continue
+            if start is None:
+                start = offset
+            matched += piece
+            end = offset + duration
+        if matched != target:
+            break
+        spans[position] = (start / TICKS_PER_SECOND, end / TICKS_PER_SECOND)
+    return spans
+
+
+def split_audio(
+    audio: bytes,
+    words: List[str],
+    boundaries: List[Tuple[int, int, str]]
+) -> Dict[str, bytes]:
+    """
+    按词语边界把整段音频切分成每个词语的 MP3 片段
+
+    相邻词语在两者之间停顿的中点切开，第一个词语从音频开头开始，最后一个词语到音频结尾。
+
+    Args:
+        audio: 整段合成的 MP3 数据
+        words: 合成时拼接的词语列表
+        boundaries: (偏移, 时长, 文本) 列表
+
+    Returns:
+        词语 -> 音频片段，未能对齐或切分结果为空的词语不包含在内
+    """
+    frames = iter_frames(audio)
+    if not frames:
+        return {}
+    total_duration = sum(frame.duration for frame in frames)
+
+    spans = align_words(words, boundaries)
+    segments = {}
+    for position, word in enumerate(words):
+        span = spans[position]
+        if span is None or span[1] > total_duration + 0.5:
+            continue
+        if position == 0:
+            start = 0.0
+        else:
+            previous = spans[position - 1]
+            start = (previous[1] + span[0]) / 2 if previous else span[0]
+        if position == len(words) - 1:
+            end = total_duration
+        else:
+            following = spans[position + 1]
+            end = (span[1] + following[0]) / 2 if following else min(span[1] + TAIL_PADDING, total_duration)
+        data = slice_frames(audio, frames, start, end)
+        if data:
+            segments[word] = data
+    return segments
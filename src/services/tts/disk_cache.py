@@ -0,0 +1,210 @@
+import os
+import time
+import uuid
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Any
+
+
+class DiskCache:
+    """按缓存键存放 MP3 文件的磁盘缓存，维护一份内存索引（键 -> 大小/修改时间）"""
+
+    SUFFIX = ".mp3"
+    TEMP_SUFFIX = ".tmp"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 0, temp_max_age: float = 3600):
+        """
+        初始化磁盘缓存，扫描缓存目录建立索引
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存占用的最大字节数，0 表示不限制
+            temp_max_age: 临时文件超过该时长（秒）视为异常退出遗留的文件
+        """
+        self._cache_dir = cache_dir
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(0, max_bytes)
+        self._temp_max_age = temp_max_age
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._access: Dict[str, float] = {}  # 最近访问时间（进程内记录，不依赖文件系统的 atime）
+        self._total_bytes = 0
+        
+        # GC 统计
+        self.evictions = 0
+        self.swept_temp_files = 0
+        self.gc_runs = 0
+        self.last_gc_time = None
+        self.last_gc_duration = 0.0
+        
+        self.scan()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def scan(self) -> None:
+        """重新扫描缓存目录，重建索引（同步）"""
+        index = {}
+        access = {}
+        total = 0
+        with os.scandir(self._cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.SUFFIX) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if stat.st_size == 0:
+                    continue
+                key = entry.name[:-len(self.SUFFIX)]
+                index[key] = (stat.st_size, stat.st_mtime)
+                access[key] = max(stat.st_atime, stat.st_mtime)
+                total += stat.st_size
+        with self._lock:
+            self._index = index
+            self._access = access
+            self._total_bytes = total
+
+    def path_for(self, key: str) -> Path:
+        """获取缓存键对应的文件路径"""
+        return self._cache_dir / f"{key}{self.SUFFIX}"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_entry(self, key: str) -> Optional[Tuple[int, float]]:
+        """获取索引中的 (大小, 修改时间)，不存在时返回 None"""
+        return self._index.get(key)
+
+    def read(self, key: str) -> Optional[bytes]:
+        """
+        读取缓存文件（同步，需在线程中调用）
+
+        Returns:
+            音频数据，索引中不存在或文件已丢失时返回 None
+        """
+        if key not in self._index:
+            return None
+        try:
+            data = self.path_for(key).read_bytes()
+            self.touch(key)
+            return data
+        except FileNotFoundError:
+            # 文件被外部删除，同步更新索引
+            with self._lock:
+                self._drop(key)
+            return None
+
+    def write(self, key: str, data: bytes) -> None:
+        """原子写入缓存文件并更新索引（同步，需在线程中调用）"""
+        cache_file = self.path_for(key)
+        # 临时文件名唯一，避免多个进程写同一个文件
+        temp_file = cache_file.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            temp_file.write_bytes(data)
+            temp_file.replace(cache_file)
+        finally:
+            temp_file.unlink(missing_ok=True)
+
+        self._index_file(key, cache_file)
+
+    def register(self, key: str) -> None:
+        """将已放入缓存目录的文件加入索引（同步，用于由外部原子移动到位的文件）"""
+        self._index_file(key, self.path_for(key))
+
+    def _index_file(self, key: str, cache_file: Path) -> None:
+        stat = cache_file.stat()
+        with self._lock:
+            self._drop(key)
+            self._index[key] = (stat.st_size, stat.st_mtime)
+            self._access[key] = time.time()
+            self._total_bytes += stat.st_size
+
+    def touch(self, key: str) -> None:
+        """记录一次访问，用于 LRU 淘汰"""
+        if key in self._index:
+            self._access[key] = time.time()
+
+    def remove(self, key: str) -> None:
+        """删除缓存文件并更新索引（同步）"""
+        self.path_for(key).unlink(missing_ok=True)
+        with self._lock:
+            self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        """从索引中移除条目，调用方需持有锁"""
+        entry = self._index.pop(key, None)
+        self._access.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """
+        执行一次垃圾回收（同步，需在线程中调用）
+
+        1. 清理异常退出遗留的临时文件和空缓存文件
+        2. 超出容量上限时，按最近访问时间淘汰缓存，直到降到上限的 90%
+
+        Returns:
+            本次回收删除的临时文件数、淘汰的缓存数和释放的字节数
+        """
+        start_time = time.time()
+        swept = 0
+        with os.scandir(self._cache_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                    if entry.name.endswith(self.TEMP_SUFFIX):
+                        if start_time - stat.st_mtime > self._temp_max_age:
+                            os.unlink(entry.path)
+                            swept += 1
+                    elif entry.name.endswith(self.SUFFIX) and stat.st_size == 0:
+                        os.unlink(entry.path)
+                        swept += 1
+                except FileNotFoundError:
+                    continue
+
+        evicted = 0
+        freed = 0
+        if self._max_bytes and self._total_bytes > self._max_bytes:
+            target = int(self._max_bytes * 0.9)
+            with self._lock:
+                candidates = sorted(self._access.items(), key=lambda item: item[1])
+            for key, _ in candidates:
+                if self._total_bytes <= target:
+                    break
+                entry = self._index.get(key)
+                if entry is None:
+                    continue
+                self.remove(key)
+                evicted += 1
+                freed += entry[0]
+
+        self.swept_temp_files += swept
+        self.evictions += evicted
+        self.gc_runs += 1
+        self.last_gc_time = start_time
+        self.last_gc_duration = time.time() - start_time
+        return {
+            "sweptTempFiles": swept,
+            "evictions": evicted,
+            "freedBytes": freed
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取磁盘缓存统计信息"""
+        return {
+            "backend": "files",
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "maxBytes": self._max_bytes,
+            "evictions": self.evictions,
+            "sweptTempFiles": self.swept_temp_files,
+            "gcRuns": self.gc_runs,
+            "lastGcTime": self.last_gc_time,
+            "lastGcDuration": round(self.last_gc_duration, 3)
+        }
@@ -1,5 +1,6 @@
 import edge_tts
-from typing import Optional, List, Dict, Any
+from edge_tts.exceptions import NoAudioReceived
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple, Callable
 import asyncio
 from pathlib import Path
 import tempfile
@@ -12,22 +13,56 @@ import ssl
 import certifi
 import datetime
 import sys
+import uuid
+import json
+from .memory_cache import AudioMemoryCache
+from .disk_cache import DiskCache
+from .pack_cache import PackCache
+from .upstream import CircuitOpenError, Priority, UpstreamTicket, is_upstream_error
+from .scheduler import get_upstream_scheduler
+from .boundaries import split_audio
+from ...config.settings import Settings
 
 # 为旧版本 Python 添加 UTC 支持
 if not hasattr(datetime, 'UTC'):
     datetime.UTC = datetime.timezone.utc
 
 class EdgeTTSService:
-    def __init__(self):
+    LESSON_SEPARATOR = "。"  # 整课合成时词语之间的分隔符，让每个词语后有明显停顿
+    
+    def __init__(self, settings: Optional[Settings] = None):
+        self._settings = settings or Settings()
+        if self._settings.EDGE_TTS_WSS_URL:
+            # 指向本地模拟服务等自定义地址
+            edge_tts.communicate.WSS_URL = self._settings.EDGE_TTS_WSS_URL
+        
         # 使用项目根目录下的cache目录
-        self._cache_dir = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))) / "cache/tts/words"
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
-        self._cache = {}  # 内存缓存
-        self._max_concurrent = 5  # 最大并发数
-        self._semaphore = asyncio.Semaphore(self._max_concurrent)
+        cache_root = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))) / "cache/tts"
+        self._cache_dir = cache_root / "words"
+        if self._settings.TTS_CACHE_BACKEND == "pack":
+            # 打包存储：追加写入分段文件，读取时返回 mmap 的 memoryview 切片
+            self._disk_cache = PackCache(
+                cache_root / "pack",
+                max_bytes=self._settings.TTS_DISK_CACHE_MAX_BYTES,
+                segment_max_bytes=self._settings.TTS_PACK_SEGMENT_MAX_BYTES
+            )
+        else:
+            self._disk_cache = DiskCache(
+                self._cache_dir,
+                max_bytes=self._settings.TTS_DISK_CACHE_MAX_BYTES,
+                temp_max_age=self._settings.TTS_CACHE_TEMP_MAX_AGE
+            )  # 文件缓存（启动时建立索引）
+        self._gc_task: Optional[asyncio.Task] = None  # 文件缓存垃圾回收任务
+        self._cache = AudioMemoryCache(self._settings.TTS_MEMORY_CACHE_MAX_BYTES)  # 内存缓存（LRU）
+        self._inflight: Dict[str, Tuple[asyncio.Task, UpstreamTicket]] = {}  # 进行中的生成任务（按缓存键合并）
+        self._max_concurrent = self._settings.TTS_UPSTREAM_INITIAL_CONCURRENCY  # 批量生成的并发窗口
+        self._scheduler = get_upstream_scheduler(self._settings)  # 全局共享的上游并发预算和熔断器
         self._voices_cache = None  # 语音列表缓存
         self._voices_cache_time = 0  # 语音列表缓存时间
-        self._voices_cache_ttl = 3600  # 缓存有效期（1小时）
+        self._voices_cache_ttl = self._settings.TTS_VOICES_CACHE_TTL  # 缓存有效期，过期后在后台刷新
+        self._voices_file = cache_root / "voices.json"  # 语音列表持久化文件
+        self._voices_refresh_task: Optional[asyncio.Task] = None
+        self._load_voices_file()
         
         # 获取代理设置
         self._proxy = os.environ.get('HTTPS_PROXY') or os.environ.get('HTTP_PROXY')
@@ -44,7 +79,7 @@ class EdgeTTSService:
         self._ssl_context.verify_mode = ssl.CERT_NONE
         
         self._connector = TCPConnector(
-            limit=self._max_concurrent,  # 限制最大连接数
+            limit=self._settings.TTS_UPSTREAM_MAX_CONCURRENCY,  # 限制最大连接数
             ttl_dns_cache=300,  # DNS缓存时间
             use_dns_cache=True,
             ssl=self._ssl_context  # 只使用 ssl 参数，不使用 verify_ssl
@@ -55,7 +90,7 @@ class EdgeTTSService:
         """获取或创建共享的会话"""
         if self._session is None or self._session.closed:
             # 配置代理
-            if hasattr(self, '_proxy'):
+            if self._proxy:
                 self._session = ClientSession(
                     connector=self._connector,
                     trust_env=True,
@@ -63,7 +98,7 @@ class EdgeTTSService:
                         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0'
                     }
                 )
-                if self._https_proxy:
+                if getattr(self, '_https_proxy', None):
                     self._session.proxy = self._https_proxy
             else:
                 self._session = ClientSession(
@@ -84,7 +119,7 @@ class EdgeTTSService:
         rate: float = 1.0,
         max_retries: int = 10,
         initial_retry_delay: float = 1.0,
-        chunk_size: int = 5  # 每批处理的数量
+        priority: int = Priority.INTERACTIVE
     ) -> Dict[str, Optional[bytes]]:
         """
         批量生成音频数据
@@ -95,21 +130,76 @@ class EdgeTTSService:
             rate: 语速 (0.5-2.0)
             max_retries: 最大重试次数
             initial_retry_delay: 初始重试延迟（秒）
-            chunk_size: 每批处理的数量
+            priority: 上游请求的优先级
             
         Returns:
             Dict[str, Optional[bytes]]: 文本到音频数据的映射
         """
         results = {}
-        session = await self._get_session()
+        async for text, audio_data in self.iter_audio_batch(
+            texts,
+            voice=voice,
+            rate=rate,
+            max_retries=max_retries,
+            initial_retry_delay=initial_retry_delay,
+            priority=priority
+        ):
+            results[text] = audio_data
+        return results
+        
+    async def iter_audio_batch(
+        self,
+        texts: List[str],
+        voice: str = "zh-CN-XiaoxiaoNeural",
+        rate: float = 1.0,
+        max_retries: int = 10,
+        initial_retry_delay: float = 1.0,
+        priority: int = Priority.INTERACTIVE
+    ) -> AsyncIterator[Tuple[str, Optional[bytes]]]:
+        """
+        以滑动窗口方式批量生成音频，按完成顺序逐个返回结果
         
-        # 将文本分成多个批次
-        for i in range(0, len(texts), chunk_size):
-            chunk = texts[i:i + chunk_size]
-            tasks = []
+        始终保持 _max_concurrent 个生成任务在执行，某个任务完成后立即补上下一个，
+        不会因为单个慢请求而让其他并发槽位空闲。
+        开启 TTS_LESSON_SYNTHESIS 时，未缓存的词语先按组拼成一句话整体合成。
+        
+        Args:
+            texts: 要转换的文本列表（重复的文本只生成一次）
+            voice: 语音名称
+            rate: 语速 (0.5-2.0)
+            max_retries: 最大重试次数
+            initial_retry_delay: 初始重试延迟（秒）
+            priority: 上游请求的优先级
             
-            # 创建当前批次的所有任务
-            for text in chunk:
+        Yields:
+            (文本, 音频数据) 元组，生成失败时音频数据为 None
+        """
+        pending = iter(dict.fromkeys(texts))
+        running: Dict[asyncio.Task, str] = {}
+        session = await self._get_session()
+        
+        if self._settings.TTS_LESSON_SYNTHESIS:
+            rate = max(0.5, min(2.0, rate))
+            missing = [
+                text for text in dict.fromkeys(texts)
+                if text.strip()
+                and not self.check_cache_exists(text, voice, rate)
+                and self._get_cache_key(text, voice, rate) not in self._inflight
+            ]
+            group_size = max(1, self._settings.TTS_LESSON_MAX_WORDS)
+            for i in range(0, len(missing), group_size):
+                self._start_lesson_synthesis(
+                    missing[i:i + group_size],
+                    voice,
+                    rate,
+                    priority=priority,
+                    max_retries=max_retries,
+                    initial_retry_delay=initial_retry_delay,
+                    session=session
+                )
+        
+        def start_next() -> None:
+            for text in pending:
                 task = asyncio.create_task(
                     self.generate_audio(
                         text=text,
@@ -117,21 +207,35 @@ class EdgeTTSService:
                         rate=rate,
                         max_retries=max_retries,
                         initial_retry_delay=initial_retry_delay,
-                        session=session
+                        session=session,
+                        priority=priority
                     )
                 )
-                tasks.append((text, task))
+                running[task] = text
+                return
+        
+        try:
+            # 填满并发窗口
+            for _ in range(self._max_concurrent):
+                start_next()
             
-            # 等待当前批次的所有任务完成
-            for text, task in tasks:
-                try:
-                    audio_data = await task
-                    results[text] = audio_data
-                except Exception as e:
-                    print(f"生成音频失败 ({text}): {str(e)}")
-                    results[text] = None
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    text = running.pop(task)
+                    try:
+                        audio_data = task.result()
+                    except Exception as e:
+                        print(f"生成音频失败 ({text}): {str(e)}")
+                        audio_data = None
                     
-        return results
+                    # 先补充新任务，再返回结果，保证窗口始终是满的
+                    start_next()
+                    yield text, audio_data
+        finally:
+            # 调用方提前退出时取消剩余的等待（共享的生成任务仍会在后台完成）
+            for task in running:
+                task.cancel()
         
     async def generate_audio(
         self,
@@ -140,9 +244,17 @@ class EdgeTTSService:
         rate: float = 1.0,
         max_retries: int = 10,
         initial_retry_delay: float = 1.0,
-        session: Optional[ClientSession] = None
+        session: Optional[ClientSession] = None,
+        priority: int = Priority.INTERACTIVE
     ) -> Optional[bytes]:
-        """生成音频数据"""
+        """
+        生成音频数据
+        
+        使用打包存储时，命中缓存返回的是 memoryview（与 bytes 一样可直接写出）
+        
+        Args:
+            priority: 上游请求的优先级，合并到已有任务时会提升该任务的优先级
+        """
         start_time = time.time()
         print(f"开始处理TTS请求: {text}")
         
@@ -153,28 +265,288 @@ class EdgeTTSService:
         cache_key = self._get_cache_key(text, voice, rate)
         
         # 检查内存缓存
-        if cache_key in self._cache:
+        audio_data = self._cache.get(cache_key)
+        if audio_data is not None:
             print(f"命中内存缓存，耗时: {(time.time() - start_time):.2f}秒")
-            return self._cache[cache_key]
+            return audio_data
             
-        # 检查文件缓存
-        cache_file = self._cache_dir / f"{cache_key}.mp3"
-        if cache_file.exists():
-            # 检查文件大小
-            if cache_file.stat().st_size > 0:
-                audio_data = cache_file.read_bytes()
-                self._cache[cache_key] = audio_data
-                print(f"命中文件缓存，耗时: {(time.time() - start_time):.2f}秒")
-                return audio_data
-            else:
-                # 删除空文件
-                print(f"删除空的缓存文件: {cache_file}")
-                cache_file.unlink()
+        # 检查文件缓存（文件读写放到线程中执行，避免阻塞事件循环）
+        audio_data = None
+        if cache_key in self._disk_cache:
+            audio_data = await asyncio.to_thread(self._disk_cache.read, cache_key)
+        if audio_data is not None:
+            # 打包存储返回的是映射内存的切片，已由页缓存承载，无需再放入内存缓存
+            if isinstance(audio_data, bytes):
+                self._cache.put(cache_key, audio_data)
+            print(f"命中文件缓存，耗时: {(time.time() - start_time):.2f}秒")
+            return audio_data
+        
+        # 合并并发的相同请求：同一缓存键同时只调用一次 Edge TTS
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            task = self._start_synthesis(
+                text,
+                voice,
+                rate,
+                cache_key,
+                priority=priority,
+                max_retries=max_retries,
+                initial_retry_delay=initial_retry_delay,
+                session=session
+            )
+        else:
+            print(f"合并到进行中的TTS请求: {text}")
+            task, ticket = inflight
+            # 实时请求合并到后台任务时，提升其排队优先级
+            self._scheduler.boost(ticket, priority)
+        
+        # 使用 shield，某个调用方被取消时不会中断其他调用方共享的生成任务
+        audio_data = await asyncio.shield(task)
+        if audio_data is not None:
+            print(f"TTS请求处理完成，总耗时: {(time.time() - start_time):.2f}秒")
+        return audio_data
+        
+    async def stream_audio(
+        self,
+        text: str,
+        voice: str = "zh-CN-XiaoxiaoNeural",
+        rate: float = 1.0,
+        max_retries: int = 10,
+        initial_retry_delay: float = 1.0
+    ) -> AsyncIterator[bytes]:
+        """
+        流式生成音频数据
+        
+        未命中缓存时，Edge TTS 返回的音频块会立即转发给调用方，同时写入缓存文件。
+        客户端中途断开时，生成任务会在后台继续完成，以便填充缓存。
+        
+        Args:
+            text: 要转换的文本
+            voice: 语音名称
+            rate: 语速 (0.5-2.0)
+            max_retries: 最大重试次数
+            initial_retry_delay: 初始重试延迟（秒）
+            
+        Yields:
+            音频数据块
+            
+        Raises:
+            Exception: 生成失败，或已发送部分数据后上游连接中断
+        """
+        rate = max(0.5, min(2.0, rate))
+        cache_key = self._get_cache_key(text, voice, rate)
+        
+        # 已有缓存或已有相同的生成任务时，等待完整结果后一次性返回
+        if self.check_cache_exists(text, voice, rate) or cache_key in self._inflight:
+            audio_data = await self.generate_audio(
+                text,
+                voice=voice,
+                rate=rate,
+                max_retries=max_retries,
+                initial_retry_delay=initial_retry_delay
+            )
+            if audio_data is None:
+                raise Exception("生成语音失败")
+            yield bytes(audio_data)
+            return
+        
+        print(f"开始流式处理TTS请求: {text}")
+        self._cache.record_miss()
+        queue: asyncio.Queue = asyncio.Queue()
+        task = self._start_synthesis(
+            text,
+            voice,
+            rate,
+            cache_key,
+            priority=Priority.INTERACTIVE,
+            max_retries=max_retries,
+            initial_retry_delay=initial_retry_delay,
+            on_chunk=lambda attempt, data: queue.put_nowait((attempt, data))
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        
+        streamed_attempt = None
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            attempt, data = item
+            if streamed_attempt is None:
+                streamed_attempt = attempt
+            elif attempt != streamed_attempt:
+                # 已发送的数据来自失败的那次尝试，无法透明重试
+                raise Exception("流式生成中断，上游连接失败")
+            yield data
+        
+        if task.result() is None:
+            raise Exception("生成语音失败")
+            
+    def _start_synthesis(
+        self,
+        text: str,
+        voice: str,
+        rate: float,
+        cache_key: str,
+        priority: int = Priority.INTERACTIVE,
+        **kwargs
+    ) -> asyncio.Task:
+        """创建生成任务并登记到进行中的任务表"""
+        ticket = UpstreamTicket(priority)
+        task = asyncio.create_task(self._synthesize(text, voice, rate, cache_key, ticket=ticket, **kwargs))
+        self._inflight[cache_key] = (task, ticket)
+        task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        return task
+        
+    def _start_lesson_synthesis(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        priority: int = Priority.INTERACTIVE,
+        **kwargs
+    ) -> None:
+        """
+        为一组词语创建整课合成任务，并把每个词语登记到进行中的任务表
+        
+        其他请求可以直接合并到对应词语的任务上；未能从整段音频中切分出来的词语会单独生成。
+        """
+        ticket = UpstreamTicket(priority)
+        group = asyncio.create_task(self._synthesize_lesson(words, voice, rate, ticket))
+        for word in words:
+            cache_key = self._get_cache_key(word, voice, rate)
+            task = asyncio.create_task(
+                self._finish_lesson_word(group, word, voice, rate, cache_key, ticket=ticket, **kwargs)
+            )
+            self._inflight[cache_key] = (task, ticket)
+            task.add_done_callback(lambda _, key=cache_key: self._inflight.pop(key, None))
+            
+    async def _finish_lesson_word(
+        self,
+        group: asyncio.Task,
+        text: str,
+        voice: str,
+        rate: float,
+        cache_key: str,
+        ticket: UpstreamTicket,
+        **kwargs
+    ) -> Optional[bytes]:
+        """等待整课合成完成并取出词语的音频，切分失败时单独生成"""
+        segments = await asyncio.shield(group)
+        audio_data = segments.get(text)
+        if audio_data is not None:
+            return audio_data
+        # 整课请求的票据由各词语共享，单独生成时每个词语需要自己的票据（沿用提升后的优先级）
+        return await self._synthesize(text, voice, rate, cache_key, ticket=UpstreamTicket(ticket.priority), **kwargs)
+        
+    async def _synthesize_lesson(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        ticket: Optional[UpstreamTicket] = None
+    ) -> Dict[str, bytes]:
+        """
+        把多个词语拼成一句话，通过一次上游请求合成，再按 WordBoundary 事件切分并写入缓存
+        
+        Returns:
+            词语 -> 音频片段，合成失败或未能对齐的词语不包含在内
+            
+        Raises:
+            CircuitOpenError: 上游处于熔断状态
+        """
+        start_time = time.time()
+        print(f"开始整课合成 {len(words)} 个词语...")
+        try:
+            # 在占用上游槽位之前创建，语音名称等参数错误不计入上游失败
+            communicate = self._create_communicate(self.LESSON_SEPARATOR.join(words), voice, rate)
+            # 整课合成的耗时随词语数增长，不能按单个词语的目标延迟判断上游是否过载
+            async with self._scheduler.request(ticket, measure_latency=False):
+                chunks = []
+                boundaries = []
+                async for message in communicate.stream():
+                    if message["type"] == "audio":
+                        chunks.append(message["data"])
+                    elif message["type"] == "WordBoundary":
+                        boundaries.append((message["offset"], message["duration"], message["text"]))
+                        
+                audio_data = b"".join(chunks)
+                if not audio_data:
+                    raise NoAudioReceived("生成的音频文件为空")
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"整课合成失败，改为逐个生成: {str(e)}")
+            return {}
+            
+        segments = await asyncio.to_thread(split_audio, audio_data, words, boundaries)
+        for word, segment in segments.items():
+            cache_key = self._get_cache_key(word, voice, rate)
+            self._cache.put(cache_key, segment)
+            try:
+                await asyncio.to_thread(self._disk_cache.write, cache_key, segment)
+            except Exception as e:
+                print(f"写入缓存文件失败: {str(e)}")
+                
+        print(f"整课合成完成: {len(segments)}/{len(words)} 个词语切分成功，耗时: {(time.time() - start_time):.2f}秒")
+        return segments
+        
+    def _create_communicate(
+        self,
+        text: str,
+        voice: str,
+        rate: float,
+        session: Optional[ClientSession] = None
+    ) -> edge_tts.Communicate:
+        """
+        创建 Edge TTS 通信对象
+        
+        Raises:
+            ValueError: 语音名称或语速不合法
+        """
+        rate_str = "+" if rate >= 1 else "-"
+        rate_str += f"{abs(int((rate - 1) * 100))}%"
+        communicate = edge_tts.Communicate(
+            text,
+            voice,
+            rate=rate_str
+        )
+        
+        # 设置会话和代理
+        if session is not None:
+            communicate._client_session = session
+        if hasattr(self, '_wss_proxy'):
+            communicate._websocket_kwargs = {
+                "proxy": self._wss_proxy,
+                "ssl": self._ssl_context
+            }
+        return communicate
+        
+    async def _synthesize(
+        self,
+        text: str,
+        voice: str,
+        rate: float,
+        cache_key: str,
+        max_retries: int = 10,
+        initial_retry_delay: float = 1.0,
+        session: Optional[ClientSession] = None,
+        on_chunk: Optional[Callable[[int, bytes], None]] = None,
+        ticket: Optional[UpstreamTicket] = None
+    ) -> Optional[bytes]:
+        """
+        调用 Edge TTS 生成音频并写入缓存
+        
+        Args:
+            ticket: 上游排队凭证，决定等待并发槽位时的优先级
+            on_chunk: 可选回调，每收到一个音频块时以 (尝试序号, 数据) 调用
+            
+        Raises:
+            CircuitOpenError: 上游处于熔断状态
+        """
+        start_time = time.time()
         
         # 生成新的音频
         print("开始调用 Edge TTS 服务...")
-        tts_start_time = time.time()
-        temp_file = None
         
         # 使用提供的会话或创建新会话
         should_close_session = False
@@ -185,60 +557,54 @@ class EdgeTTSService:
         try:
             for attempt in range(max_retries):
                 try:
-                    async with self._semaphore:  # 限制并发数
-                        # 创建通信对象
-                        rate_str = "+" if rate >= 1 else "-"
-                        rate_str += f"{abs(int((rate - 1) * 100))}%"
-                        communicate = edge_tts.Communicate(
-                            text,
-                            voice,
-                            rate=rate_str
-                        )
-                        
-                        # 设置会话和代理
-                        communicate._client_session = session
-                        if hasattr(self, '_wss_proxy'):
-                            communicate._websocket_kwargs = {
-                                "proxy": self._wss_proxy,
-                                "ssl": self._ssl_context
-                            }
-                        
+                    # 在占用上游槽位之前创建通信对象，语音名称等参数错误不计入上游失败
+                    communicate = self._create_communicate(text, voice, rate, session)
+                    
+                    # 全局调度器按优先级分配槽位，上游熔断时抛出 CircuitOpenError，不再重试
+                    async with self._scheduler.request(ticket):
                         # 生成音频
-                        temp_file = cache_file.with_suffix('.tmp')
-                        await communicate.save(str(temp_file))
-                        
-                        # 验证生成的文件
-                        if not temp_file.exists() or temp_file.stat().st_size == 0:
-                            raise Exception("生成的音频文件为空")
-                        
-                        # 读取音频数据
-                        audio_data = temp_file.read_bytes()
-                        
-                        # 如果成功读取，将临时文件移动到缓存文件
-                        temp_file.replace(cache_file)
-                        
-                        # 更新内存缓存
-                        self._cache[cache_key] = audio_data
-                        
-                        print(f"Edge TTS 服务调用完成，耗时: {(time.time() - tts_start_time):.2f}秒")
-                        total_time = time.time() - start_time
-                        print(f"TTS请求处理完成，总耗时: {total_time:.2f}秒")
+                        chunks = []
+                        async for message in communicate.stream():
+                            if message["type"] != "audio":
+                                continue
+                            chunks.append(message["data"])
+                            if on_chunk is not None:
+                                on_chunk(attempt, message["data"])
                         
-                        return audio_data
+                        # 验证生成的音频
+                        audio_data = b"".join(chunks)
+                        if not audio_data:
+                            raise NoAudioReceived("生成的音频文件为空")
+                    
+                    # 更新内存缓存和文件缓存
+                    self._cache.put(cache_key, audio_data)
+                    try:
+                        await asyncio.to_thread(self._disk_cache.write, cache_key, audio_data)
+                    except Exception as e:
+                        print(f"写入缓存文件失败: {str(e)}")
+                    
+                    print(f"Edge TTS 服务调用完成，耗时: {(time.time() - start_time):.2f}秒")
+                    
+                    return audio_data
                         
+                except CircuitOpenError:
+                    raise
                 except Exception as e:
-                    # 清理临时文件
-                    if temp_file and temp_file.exists():
-                        temp_file.unlink()
-                    
+                    if not is_upstream_error(e):
+                        # 参数错误等非上游问题，重试也不会成功
+                        print(f"生成音频失败: {type(e).__name__}: {str(e)}")
+                        return None
                     # 如果是最后一次尝试，则抛出异常
                     if attempt == max_retries - 1:
                         print(f"生成音频失败，已达到最大重试次数: {str(e)}")
                         print(f"错误发生时总耗时: {(time.time() - start_time):.2f}秒")
                         return None
                     
-                    # 计算下一次重试的延迟时间（指数退避）
-                    retry_delay = initial_retry_delay * (2 ** attempt)
+                    # 计算下一次重试的延迟时间（指数退避，设有上限）
+                    retry_delay = min(
+                        initial_retry_delay * (2 ** attempt),
+                        self._settings.TTS_MAX_RETRY_DELAY
+                    )
                     print(f"第 {attempt + 1} 次尝试失败: {str(e)}")
                     print(f"等待 {retry_delay:.1f} 秒后重试...")
                     await asyncio.sleep(retry_delay)
@@ -248,21 +614,59 @@ class EdgeTTSService:
             if should_close_session:
                 await session.close()
                 
-    async def get_available_voices(self) -> list:
+    async def get_available_voices(
+        self,
+        locales: Optional[List[str]] = None,
+        gender: Optional[str] = None
+    ) -> list:
         """
         获取可用的语音列表
         
+        优先返回缓存的列表；缓存过期时在后台刷新，不阻塞当前请求。
+        只有从未获取过语音列表时才会等待 Edge TTS 服务返回。
+        
+        Args:
+            locales: 只返回这些语言区域的语音（如 zh-CN，也可以只写语言 zh）
+            gender: 只返回该性别的语音（Female 或 Male）
+            
         Returns:
             语音列表
         """
+        if self._voices_cache is None:
+            await asyncio.shield(self._ensure_voices_refresh())
+        elif time.time() - self._voices_cache_time >= self._voices_cache_ttl:
+            print("语音列表已过期，在后台刷新")
+            self._ensure_voices_refresh()
+            
+        voices = self._voices_cache or []
+        if locales:
+            wanted = [locale.lower() for locale in locales]
+            voices = [
+                voice for voice in voices
+                if any(
+                    voice["locale"].lower() == locale or voice["locale"].lower().startswith(f"{locale}-")
+                    for locale in wanted
+                )
+            ]
+        if gender:
+            voices = [voice for voice in voices if voice["gender"].lower() == gender.lower()]
+        return voices
+        
+    def start_voices_refresh(self) -> None:
+        """语音列表缺失或过期时，在后台刷新"""
+        if (self._voices_cache is None or
+                time.time() - self._voices_cache_time >= self._voices_cache_ttl):
+            self._ensure_voices_refresh()
+            
+    def _ensure_voices_refresh(self) -> asyncio.Task:
+        """获取进行中的刷新任务，没有时创建一个（多个请求共享同一次刷新）"""
+        if self._voices_refresh_task is None or self._voices_refresh_task.done():
+            self._voices_refresh_task = asyncio.create_task(self._refresh_voices())
+        return self._voices_refresh_task
+        
+    async def _refresh_voices(self) -> None:
+        """从 Edge TTS 服务获取语音列表，并持久化到磁盘"""
         try:
-            # 检查缓存是否有效
-            current_time = time.time()
-            if (self._voices_cache is not None and 
-                current_time - self._voices_cache_time < self._voices_cache_ttl):
-                print("使用缓存的语音列表")
-                return self._voices_cache
-                
             print("从 Edge TTS 服务获取语音列表...")
             start_time = time.time()
             voices = await edge_tts.list_voices()
@@ -277,23 +681,73 @@ class EdgeTTSService:
             
             # 更新缓存
             self._voices_cache = voices_list
-            self._voices_cache_time = current_time
+            self._voices_cache_time = start_time
+            await asyncio.to_thread(self._save_voices_file, voices_list, start_time)
             
             print(f"获取语音列表完成，耗时: {(time.time() - start_time):.2f}秒")
-            return voices_list
             
         except Exception as e:
+            # 刷新失败时继续使用已有的缓存
             print(f"获取语音列表失败: {str(e)}")
-            # 如果有缓存，在出错时返回缓存的数据
-            if self._voices_cache is not None:
-                print("使用缓存的语音列表（出错回退）")
-                return self._voices_cache
-            return [] 
+            
+    def _load_voices_file(self) -> None:
+        """启动时加载持久化的语音列表"""
+        try:
+            data = json.loads(self._voices_file.read_text(encoding="utf-8"))
+            self._voices_cache = data["voices"]
+            self._voices_cache_time = data["fetchedAt"]
+            print(f"已加载缓存的语音列表，共 {len(self._voices_cache)} 个语音")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"加载语音列表缓存失败: {str(e)}")
+            
+    def _save_voices_file(self, voices: list, fetched_at: float) -> None:
+        """原子写入语音列表缓存文件（同步，需在线程中调用）"""
+        temp_file = self._voices_file.with_name(f"{self._voices_file.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            temp_file.write_text(
+                json.dumps({"fetchedAt": fetched_at, "voices": voices}, ensure_ascii=False),
+                encoding="utf-8"
+            )
+            temp_file.replace(self._voices_file)
+        finally:
+            temp_file.unlink(missing_ok=True)
+            
+    def get_memory_cached(self, text: str, voice: str, rate: float) -> Optional[bytes]:
+        """
+        从内存缓存中获取音频数据，未命中时返回 None
+        
+        未命中不计入统计，由之后的 get_cached_file、stream_audio 或 generate_audio 计入一次。
+        """
+        return self._cache.get(self._get_cache_key(text, voice, rate), count_miss=False)
+        
+    async def get_cached_file(self, text: str, voice: str, rate: float) -> Optional[Path]:
+        """
+        获取音频缓存文件路径
+        
+        Returns:
+            缓存文件存在时返回其路径，否则返回 None
+        """
+        # 打包存储没有独立的缓存文件
+        if not isinstance(self._disk_cache, DiskCache):
+            return None
+        cache_key = self._get_cache_key(text, voice, rate)
+        if cache_key not in self._disk_cache:
+            return None
+        # 直接发送缓存文件，不再经过内存缓存读取
+        self._cache.record_miss()
+        self._disk_cache.touch(cache_key)
+        return self._disk_cache.path_for(cache_key)
 
     def check_cache_exists(self, text: str, voice: str, rate: float) -> bool:
         """检查指定文本的缓存是否存在"""
         cache_key = self._get_cache_key(text, voice, rate)
-        return cache_key in self._cache or (self._cache_dir / f"{cache_key}.mp3").exists()
+        return cache_key in self._cache or cache_key in self._disk_cache
+
+    def interactive_waiting(self) -> int:
+        """正在排队等待上游槽位的实时请求数，后台任务据此主动让路"""
+        return self._scheduler.interactive_waiting()
 
     async def ensure_cache(self, text: str, voice: str, rate: float) -> bool:
         """确保指定文本的缓存存在，如果不存在则生成"""
@@ -311,14 +765,47 @@ class EdgeTTSService:
         results = await self.generate_audio_batch(
             texts=texts,
             voice=voice,
-            rate=rate,
-            chunk_size=5  # 每次并行处理5个请求
+            rate=rate
         )
         
         # 收集失败的文本
         failed_texts = [text for text, audio in results.items() if audio is None]
         return len(failed_texts) == 0, failed_texts
         
+    def start_cache_gc(self) -> None:
+        """启动文件缓存的后台垃圾回收任务"""
+        if self._gc_task is None or self._gc_task.done():
+            self._gc_task = asyncio.create_task(self._cache_gc_loop())
+            
+    async def stop_cache_gc(self) -> None:
+        """停止后台垃圾回收任务"""
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            try:
+                await self._gc_task
+            except asyncio.CancelledError:
+                pass
+            self._gc_task = None
+            
+    async def _cache_gc_loop(self) -> None:
+        """定期清理遗留临时文件，并在超出容量上限时淘汰最久未访问的缓存"""
+        while True:
+            try:
+                result = await asyncio.to_thread(self._disk_cache.collect_garbage)
+                if result["sweptTempFiles"] or result["evictions"]:
+                    print(f"缓存垃圾回收完成: {result}")
+            except Exception as e:
+                print(f"缓存垃圾回收失败: {str(e)}")
+            await asyncio.sleep(self._settings.TTS_CACHE_GC_INTERVAL)
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """获取TTS服务的缓存统计信息"""
+        return {
+            "memoryCache": self._cache.get_stats(),
+            "diskCache": self._disk_cache.get_stats(),
+            "upstream": self._scheduler.get_stats()
+        }
+        
     async def __aenter__(self):
         """异步上下文管理器入口"""
         return self
@@ -329,4 +816,6 @@ class EdgeTTSService:
 
     def _get_cache_key(self, text: str, voice: str, rate: float) -> str:
         """生成缓存键"""
+        # 与 generate_audio 保持一致，按调整后的语速计算
+        rate = float(max(0.5, min(2.0, rate)))
         return hashlib.md5(f"{text}_{voice}_{rate}".encode()).hexdigest() 
\ No newline at end of file
@@ -0,0 +1,443 @@
+import json
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from ...config.settings import Settings
+from ..transcode import get_transcode_pool
+from ..workspace import JobWorkspace
+from . import mp3
+from .disk_cache import DiskCache
+from .edge_tts import EdgeTTSService
+from .scheduler import get_upstream_scheduler
+from .upstream import CircuitOpenError, Priority
+
+# 拼接片段：MP3 数据，或以秒为单位的停顿
+Part = Union[bytes, float]
+
+# 导出音频的编排方式（提示音、停顿时长等）变化时递增，使旧的导出缓存失效
+EXPORT_FORMAT_VERSION = 1
+
+
+def export_key(
+    words: List[str],
+    voice: str,
+    rate: float,
+    repeat_count: int,
+    repeat_interval: float
+) -> str:
+    """
+    计算导出音频的缓存键
+
+    由完整的词语列表和全部导出参数决定，相同的输入得到相同的音频，可直接作为 ETag。
+    """
+    payload = json.dumps({
+        "version": EXPORT_FORMAT_VERSION,
+        "voice": voice,
+        # 与词语缓存保持一致，按调整后的语速计算
+        "rate": float(max(0.5, min(2.0, rate))),
+        "repeatCount": repeat_count,
+        "repeatInterval": float(repeat_interval),
+        "words": words
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DictationExporter:
+    """
+    听写音频导出
+
+    从共享缓存获取词语音频，按重复次数和停顿编排成完整的听写音频。
+    每次导出使用独立的工作目录，完成后原子地移入导出缓存，多个导出可以同时进行。
+    导出结果按参数和词语列表的哈希缓存，重复导出直接返回缓存文件；
+    相同的导出同时进行时只生成一次，所有等待方都断开后才取消。
+    """
+
+    def __init__(
+        self,
+        tts_service: EdgeTTSService,
+        jobs_dir: Path,
+        exports_dir: Path,
+        start_prompt_file: Path,
+        end_prompt_file: Path,
+        settings: Optional[Settings] = None
+    ):
+        """
+        初始化导出服务
+
+        Args:
+            tts_service: Edge TTS 服务
+            jobs_dir: 存放各导出任务工作目录的根目录
+            exports_dir: 导出缓存目录
+            start_prompt_file: 开始提示音
+            end_prompt_file: 结束提示音
+            settings: 配置
+        """
+        self._tts = tts_service
+        self._jobs_dir = jobs_dir
+        self._start_prompt_file = start_prompt_file
+        self._end_prompt_file = end_prompt_file
+        self._settings = settings or Settings()
+        self._cache = DiskCache(
+            exports_dir,
+            max_bytes=self._settings.TTS_EXPORT_CACHE_MAX_BYTES,
+            temp_max_age=self._settings.TTS_CACHE_TEMP_MAX_AGE
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}  # 进行中的导出（按缓存键合并）
+        self._waiters: Dict[str, int] = {}  # 每个进行中的导出的等待方数量
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def cached_path(self, key: str) -> Optional[Path]:
+        """
+        获取已缓存的导出文件（检查文件放到线程中执行，避免阻塞事件循环）
+
+        Returns:
+            文件路径，未缓存或文件已丢失时返回 None
+        """
+        if key not in self._cache:
+            return None
+        return await asyncio.to_thread(self._check_cached, key)
+
+    def _check_cached(self, key: str) -> Optional[Path]:
+        """确认导出文件仍然存在（同步）"""
+        if key not in self._cache:
+            return None
+        path = self._cache.path_for(key)
+        if not path.exists():
+            # 文件被外部删除，同步更新索引
+            self._cache.remove(key)
+            return None
+        self._cache.touch(key)
+        return path
+
+    async def export(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        repeat_count: int,
+        repeat_interval: float
+    ) -> Tuple[str, Path]:
+        """
+        导出完整的听写音频，命中缓存时直接返回
+
+        调用方被取消时（例如客户端断开连接）只退出等待，没有其他等待方时才取消导出。
+
+        Returns:
+            (缓存键, 导出文件路径)
+
+        Raises:
+            CircuitOpenError: 上游处于熔断状态
+            Exception: 生成或合并音频失败
+        """
+        key = export_key(words, voice, rate, repeat_count, repeat_interval)
+        path = await self.cached_path(key)
+        if path is not None:
+            self.hits += 1
+            return key, path
+
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            self.misses += 1
+            task = asyncio.create_task(
+                self._build(key, words, voice, rate, repeat_count, repeat_interval)
+            )
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            return key, await asyncio.shield(task)
+        finally:
+            if not task.done():
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0:
+                    task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """导出结束后移除进行中的记录（只移除同一个任务，避免误删之后发起的导出）"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"导出听写音频失败 ({key}): {str(task.exception())}")
+
+    async def _build(
+        self,
+        key: str,
+        words: List[str],
+        voice: str,
+        rate: float,
+        repeat_count: int,
+        repeat_interval: float
+    ) -> Path:
+        """生成词语音频、编排并合并，结果存入导出缓存"""
+        audio = await self.fetch_words(words, voice, rate)
+        parts = await self.build_parts(words, audio, repeat_count, repeat_interval)
+        return await self.assemble(parts, key)
+
+    async def fetch_words(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, bytes]:
+        """
+        通过共享缓存获取每个词语的音频，未缓存的词语以批量导出优先级并发生成
+
+        Args:
+            on_progress: 每获取一个词语后调用，参数为 (已完成数, 去重后的词语总数)
+
+        Raises:
+            CircuitOpenError: 上游处于熔断状态
+            Exception: 有词语生成失败
+        """
+        total = len(dict.fromkeys(words))
+        results = {}
+        batch = self._tts.iter_audio_batch(
+            words,
+            voice=voice,
+            rate=rate,
+            max_retries=3,
+            priority=Priority.BATCH
+        )
+        try:
+            async for word, audio in batch:
+                results[word] = audio
+                if on_progress is not None:
+                    on_progress(len(results), total)
+        finally:
+            await batch.aclose()
+        failed_words = [word for word, audio in results.items() if audio is None]
+        if failed_words:
+            raise_for_failed_words(failed_words)
+        return results
+
+    async def build_parts(
+        self,
+        words: List[str],
+        audio: Dict[str, bytes],
+        repeat_count: int,
+        repeat_interval: float
+    ) -> List[Part]:
+        """
+        编排拼接顺序：开始提示音、词语（按次数重复）和停顿、结束提示音
+
+        Returns:
+            MP3 数据和停顿秒数组成的列表
+        """
+        start_prompt = await asyncio.to_thread(self._start_prompt_file.read_bytes)
+        end_prompt = await asyncio.to_thread(self._end_prompt_file.read_bytes)
+        parts: List[Part] = [start_prompt, 3.0]
+        for index, word in enumerate(words):
+            parts += word_parts(words, index, audio[word], repeat_count, repeat_interval)
+        parts += [2.0, end_prompt]
+        return parts
+
+    async def stream(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        repeat_count: int,
+        repeat_interval: float
+    ) -> AsyncIterator[bytes]:
+        """
+        边生成边输出听写音频
+
+        先输出开始提示音，之后每个词语（连同其后的停顿）一生成就按顺序输出，
+        首字节时间与词语数量无关。完整输出后结果存入导出缓存，与 export 的结果相同。
+
+        Yields:
+            MP3 数据块
+
+        Raises:
+            CircuitOpenError: 上游处于熔断状态（已输出的数据无法撤回，响应会被截断）
+            Exception: 有词语生成失败或音频格式不一致
+        """
+        key = export_key(words, voice, rate, repeat_count, repeat_interval)
+        writer = mp3.FrameWriter()
+        output = bytearray()
+
+        def write(parts: List[Part]) -> bytes:
+            data = b"".join(writer.write(part) for part in parts)
+            output.extend(data)
+            return data
+
+        start_prompt = await asyncio.to_thread(self._start_prompt_file.read_bytes)
+        yield write([start_prompt, 3.0])
+
+        # 词语按完成顺序到达，缓存在 ready 中，按原顺序输出
+        ready: Dict[str, bytes] = {}
+        position = 0
+        batch = self._tts.iter_audio_batch(
+            words,
+            voice=voice,
+            rate=rate,
+            max_retries=3,
+            priority=Priority.BATCH
+        )
+        try:
+            async for word, audio in batch:
+                if audio is None:
+                    raise_for_failed_words([word])
+                ready[word] = audio
+                while position < len(words) and words[position] in ready:
+                    yield write(word_parts(words, position, ready[words[position]], repeat_count, repeat_interval))
+                    position += 1
+        finally:
+            await batch.aclose()
+
+        end_prompt = await asyncio.to_thread(self._end_prompt_file.read_bytes)
+        yield write([2.0, end_prompt])
+
+        await asyncio.to_thread(self._cache.write, key, bytes(output))
+        await asyncio.to_thread(self._cache.collect_garbage)
+
+    async def assemble(self, parts: List[Part], key: str) -> Path:
+        """
+        合并音频并原子地存入导出缓存
+
+        优先在进程内按帧拼接，格式不一致时回退到 FFmpeg。
+
+        Returns:
+            导出缓存中的文件路径
+        """
+        async with JobWorkspace(self._jobs_dir) as workspace:
+            output_file = workspace.path / "output.mp3"
+            audio_data = None
+            if self._settings.AUDIO_CONCAT_ENGINE == "python":
+                try:
+                    audio_data = await asyncio.to_thread(mp3.join, parts)
+                except mp3.Mp3FormatError as e:
+                    print(f"无法按帧拼接音频，改用 FFmpeg: {str(e)}")
+
+            if audio_data is not None:
+                await asyncio.to_thread(output_file.write_bytes, audio_data)
+            else:
+                await concat_with_ffmpeg(parts, workspace.path, output_file)
+
+            # 检查输出文件是否存在且大小大于0
+            def has_output() -> bool:
+                return output_file.exists() and output_file.stat().st_size > 0
+            
+            if not await asyncio.to_thread(has_output):
+                raise Exception("合并音频文件失败: 输出文件不存在或为空")
+            target = self._cache.path_for(key)
+            await asyncio.to_thread(workspace.publish, output_file, target)
+            await asyncio.to_thread(self._cache.register, key)
+
+        # 超出容量上限时淘汰最久未使用的导出
+        await asyncio.to_thread(self._cache.collect_garbage)
+        return target
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取导出缓存统计信息"""
+        stats = self._cache.get_stats()
+        stats.update({
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        })
+        return stats
+
+
+def word_parts(
+    words: List[str],
+    index: int,
+    audio: bytes,
+    repeat_count: int,
+    repeat_interval: float
+) -> List[Part]:
+    """一个词语的片段：按次数重复，重复之间和词语之间加停顿（最后一个词语之后不加）"""
+    parts: List[Part] = []
+    for repeat in range(repeat_count):
+        parts.append(audio)
+        if repeat < repeat_count - 1:
+            # 词语重复之间的停顿
+            parts.append(repeat_interval)
+    if index < len(words) - 1:
+        # 词语之间的停顿
+        parts.append(repeat_interval * 2)
+    return parts
+
+
+def raise_for_failed_words(failed_words: List[str]) -> None:
+    """
+    词语生成失败时抛出异常
+
+    Raises:
+        CircuitOpenError: 上游处于熔断状态
+        Exception: 其他原因导致的失败
+    """
+    breaker = get_upstream_scheduler().breaker
+    if breaker.state == breaker.OPEN:
+        raise CircuitOpenError(breaker.retry_after())
+    raise Exception(f"以下词语生成音频失败: {', '.join(failed_words)}")
+
+
+async def run_ffmpeg(cmd: List[str]) -> Tuple[int, bytes, bytes]:
+    """通过共享的转码执行池异步执行 FFmpeg 命令，不阻塞事件循环"""
+    return await get_transcode_pool().run(cmd)
+
+
+async def concat_with_ffmpeg(parts: List[Part], work_dir: Path, output_file: Path) -> None:
+    """
+    使用 FFmpeg 拼接音频（片段格式不一致、无法按帧拼接时使用）
+
+    Args:
+        parts: MP3 数据或静音时长（秒）
+        work_dir: 存放中间文件的目录（任务独占）
+        output_file: 输出文件
+    """
+    # 相同的片段和相同时长的静音只写一个文件
+    part_files = {}
+    lines = []
+    for part in parts:
+        if isinstance(part, (int, float)):
+            key = ("silence", round(part * 1000))
+            if key not in part_files:
+                path = work_dir / f"silence_{key[1]}ms.mp3"
+                returncode, _, stderr = await run_ffmpeg([
+                    'ffmpeg', '-f', 'lavfi',
+                    '-i', 'anullsrc=r=24000:cl=mono',
+                    '-t', f"{part:.3f}",
+                    '-acodec', 'libmp3lame',
+                    '-b:a', '48k',
+                    str(path),
+                    '-y'
+                ])
+                if returncode != 0:
+                    raise Exception(f"生成静音文件失败: {stderr.decode('utf-8', errors='ignore')}")
+                part_files[key] = path
+        else:
+            key = ("audio", id(part))
+            if key not in part_files:
+                path = work_dir / f"part_{len(part_files)}.mp3"
+                await asyncio.to_thread(path.write_bytes, part)
+                part_files[key] = path
+        lines.append(f"file '{str(part_files[key].absolute())}'\n")
+
+    concat_list = work_dir / "concat.txt"
+    await asyncio.to_thread(concat_list.write_text, "".join(lines), encoding="utf-8")
+
+    returncode, _, stderr = await run_ffmpeg([
+        'ffmpeg',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', str(concat_list),
+        '-c', 'copy',
+        str(output_file),
+        '-y'
+    ])
+    if returncode != 0:
+        raise Exception(f"合并音频文件失败: {stderr.decode('utf-8', errors='ignore')}")
@@ -0,0 +1,282 @@
+import time
+import uuid
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+from .exporter import DictationExporter, export_key
+from .upstream import CircuitOpenError
+
+
+class JobQueueFull(Exception):
+    """排队的导出任务已达上限"""
+
+
+class ExportJob:
+    """一次后台导出任务的参数和进度"""
+
+    QUEUED = "queued"
+    FETCHING = "fetching"  # 获取词语音频
+    ASSEMBLING = "assembling"  # 合并音频
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+    def __init__(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        repeat_count: int,
+        repeat_interval: float,
+        filename: str
+    ):
+        self.id = uuid.uuid4().hex
+        self.words = words
+        self.voice = voice
+        self.rate = rate
+        self.repeat_count = repeat_count
+        self.repeat_interval = repeat_interval
+        self.filename = filename  # 下载时使用的文件名
+        self.key = export_key(words, voice, rate, repeat_count, repeat_interval)
+
+        self.state = self.QUEUED
+        self.progress = 0
+        self.total = len(dict.fromkeys(words))
+        self.error: Optional[str] = None
+        self.retry_after: Optional[float] = None  # 因上游熔断失败时，建议的重试等待时间（秒）
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in self.FINISHED_STATES
+
+    def update(self, **fields) -> None:
+        """更新任务状态并通知所有订阅方"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        订阅任务进度
+
+        Yields:
+            任务状态快照：先返回当前状态，之后每次变化返回一次，任务结束后停止
+        """
+        while True:
+            changed = self._changed
+            yield self.to_dict()
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态快照"""
+        return {
+            "id": self.id,
+            "exportId": self.key,
+            "state": self.state,
+            "progress": self.progress,
+            "total": self.total,
+            "error": self.error,
+            "retryAfter": self.retry_after,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+
+class ExportJobQueue:
+    """
+    后台导出任务队列
+
+    提交后立即返回任务 ID，由固定数量的后台 worker 依次执行，
+    客户端通过进度订阅了解状态，完成后按 ID 下载，不需要在整个导出过程中保持连接。
+    排队的任务数有上限，超出时拒绝提交；结束的任务保留一段时间供下载和查询。
+    """
+
+    def __init__(
+        self,
+        exporter: DictationExporter,
+        max_workers: int = 2,
+        max_queued: int = 20,
+        job_ttl: float = 3600
+    ):
+        """
+        初始化任务队列
+
+        Args:
+            exporter: 听写音频导出服务
+            max_workers: 同时执行的任务数
+            max_queued: 排队等待的任务数上限
+            job_ttl: 结束的任务保留时长（秒）
+        """
+        self._exporter = exporter
+        self._max_workers = max(1, max_workers)
+        self._max_queued = max(1, max_queued)
+        self._job_ttl = job_ttl
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, ExportJob] = {}
+        self._workers: List[asyncio.Task] = []
+
+        # 统计
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def submit(
+        self,
+        words: List[str],
+        voice: str,
+        rate: float,
+        repeat_count: int,
+        repeat_interval: float,
+        filename: str
+    ) -> ExportJob:
+        """
+        提交导出任务
+
+        Raises:
+            JobQueueFull: 排队的任务数已达上限
+        """
+        self._prune()
+        queued = sum(1 for job in self._jobs.values() if job.state == ExportJob.QUEUED)
+        if queued >= self._max_queued:
+            self.rejected += 1
+            raise JobQueueFull(f"排队的导出任务已达上限（{self._max_queued}），请稍后再试")
+
+        job = ExportJob(words, voice, rate, repeat_count, repeat_interval, filename)
+        self._jobs[job.id] = job
+        self.submitted += 1
+        self._ensure_workers()
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """按 ID 获取任务，不存在或已过期时返回 None"""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务（排队中的任务直接标记为取消，执行中的任务会被中断）
+
+        Returns:
+            是否取消了未结束的任务
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job._task is not None:
+            job._task.cancel()
+        else:
+            self._finish(job, ExportJob.CANCELLED)
+        return True
+
+    async def download_path(self, job: ExportJob) -> Optional[Path]:
+        """已完成任务的导出文件，导出缓存已被淘汰时返回 None"""
+        if job.state != ExportJob.COMPLETED:
+            return None
+        return await self._exporter.cached_path(job.key)
+
+    def _ensure_workers(self) -> None:
+        """按需启动后台 worker"""
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self._max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.state != ExportJob.QUEUED:
+                    continue
+                job._task = asyncio.create_task(self._run(job))
+                # 使用 wait 而不是直接 await，任务被取消时 worker 本身继续运行
+                await asyncio.wait({job._task})
+                if not job.finished:
+                    # 任务在开始执行前就被取消
+                    self._finish(job, ExportJob.CANCELLED)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ExportJob) -> None:
+        job.update(state=ExportJob.FETCHING, started_at=time.time())
+        try:
+            # 先获取词语音频以便汇报进度，之后的导出直接命中词语缓存
+            if await self._exporter.cached_path(job.key) is None:
+                await self._exporter.fetch_words(
+                    job.words,
+                    job.voice,
+                    job.rate,
+                    on_progress=lambda done, total: job.update(progress=done, total=total)
+                )
+            job.update(state=ExportJob.ASSEMBLING, progress=job.total)
+            await self._exporter.export(
+                job.words,
+                job.voice,
+                job.rate,
+                job.repeat_count,
+                job.repeat_interval
+            )
+            self._finish(job, ExportJob.COMPLETED)
+        except asyncio.CancelledError:
+            self._finish(job, ExportJob.CANCELLED)
+        except CircuitOpenError as e:
+            self._finish(job, ExportJob.FAILED, error=str(e), retry_after=e.retry_after)
+        except Exception as e:
+            print(f"导出任务失败 ({job.id}): {str(e)}")
+            self._finish(job, ExportJob.FAILED, error=str(e))
+
+    def _finish(self, job: ExportJob, state: str, **fields) -> None:
+        if state == ExportJob.COMPLETED:
+            self.completed += 1
+        elif state == ExportJob.FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        job.update(state=state, finished_at=time.time(), **fields)
+
+    def _prune(self) -> None:
+        """删除结束超过保留时长的任务"""
+        now = time.time()
+        for job_id in [
+            job.id for job in self._jobs.values()
+            if job.finished and now - job.finished_at > self._job_ttl
+        ]:
+            del self._jobs[job_id]
+
+    async def stop(self) -> None:
+        """停止所有 worker 并取消执行中的任务"""
+        for job in self._jobs.values():
+            if job._task is not None and not job._task.done():
+                job._task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取任务队列统计信息"""
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            "maxWorkers": self._max_workers,
+            "maxQueued": self._max_queued,
+            "jobs": states,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected
+        }
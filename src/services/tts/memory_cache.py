@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+class AudioMemoryCache:
+    """按字节预算限制的 LRU 音频内存缓存"""
+
+    def __init__(self, max_bytes: int):
+        """
+        初始化内存缓存
+
+        Args:
+            max_bytes: 缓存可占用的最大字节数，0 表示不使用内存缓存
+        """
+        self._max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._current_bytes = 0
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self.evictions = 0  # 淘汰次数
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[bytes]:
+        """
+        读取缓存，命中时将条目移动到最近使用的位置
+
+        Args:
+            key: 缓存键
+            count_miss: 未命中时是否计入统计，调用方之后还会再次读取时传 False，避免重复计数
+
+        Returns:
+            音频数据，未命中时返回 None
+        """
+        data = self._entries.get(key)
+        if data is None:
+            if count_miss:
+                self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def record_miss(self) -> None:
+        """计入一次未命中（之前以 count_miss=False 读取，之后不再经过缓存读取时调用）"""
+        self.misses += 1
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        写入缓存，超出字节预算时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            data: 音频数据
+        """
+        size = len(data)
+        # 单个条目超过预算时不放入内存，直接走文件缓存
+        if size > self._max_bytes:
+            self.discard(key)
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._current_bytes -= len(old)
+
+        self._entries[key] = data
+        self._current_bytes += size
+
+        while self._current_bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= len(evicted)
+            self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        """删除指定缓存条目"""
+        data = self._entries.pop(key, None)
+        if data is not None:
+            self._current_bytes -= len(data)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self._current_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "maxBytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / total, 4) if total else 0.0
+        }
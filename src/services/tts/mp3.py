@@ -0,0 +1,239 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+# Layer III 比特率表（kbps），按 MPEG 版本区分
+_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# 采样率表，键为版本位：3 = MPEG-1，2 = MPEG-2，0 = MPEG-2.5
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+class Mp3FormatError(ValueError):
+    """MP3 数据无法解析，或多个片段的格式不一致，不能直接按帧拼接"""
+
+
+@dataclass(frozen=True)
+class Frame:
+    """MP3 帧在数据中的位置"""
+    offset: int  # 帧在数据中的起始偏移
+    length: int  # 帧长度（字节）
+    duration: float  # 帧时长（秒）
+
+
+def parse_frame_header(data: bytes, offset: int = 0) -> Optional[Frame]:
+    """
+    解析指定位置的 MPEG Layer III 帧头
+
+    Args:
+        data: MP3 数据
+        offset: 帧头所在偏移
+
+    Returns:
+        帧信息，不是合法的 Layer III 帧头时返回 None
+    """
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1[bitrate_index] * 1000
+        samples = 1152
+    else:
+        bitrate = _BITRATES_V2[bitrate_index] * 1000
+        samples = 576
+    length = samples // 8 * bitrate // sample_rate + padding
+    return Frame(offset=offset, length=length, duration=samples / sample_rate)
+
+
+def _skip_id3(data: bytes) -> int:
+    """跳过开头的 ID3v2 标签，返回音频数据的起始偏移"""
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return 10 + size
+    return 0
+
+
+def iter_frames(data: bytes) -> List[Frame]:
+    """
+    扫描 MP3 数据中的所有帧
+
+    遇到无法识别的数据时逐字节向后寻找下一个帧头，末尾不完整的帧会被丢弃。
+    """
+    frames = []
+    offset = _skip_id3(data)
+    while offset + 4 <= len(data):
+        frame = parse_frame_header(data, offset)
+        if frame is None:
+            offset += 1
+            continue
+        if offset + frame.length > len(data):
+            break
+        frames.append(frame)
+        offset += frame.length
+    return frames
+
+
+def slice_frames(data: bytes, frames: List[Frame], start: float, end: float) -> bytes:
+    """
+    截取起始时间落在 [start, end) 区间内的帧
+
+    Args:
+        data: MP3 数据
+        frames: iter_frames 的扫描结果
+        start: 起始时间（秒）
+        end: 结束时间（秒）
+
+    Returns:
+        截取的 MP3 数据，区间内没有帧时返回空字节串
+    """
+    position = 0.0
+    first = last = None
+    for index, frame in enumerate(frames):
+        if position >= end:
+            break
+        if position >= start:
+            if first is None:
+                first = index
+            last = index
+        position += frame.duration
+    if first is None:
+        return b""
+    return bytes(data[frames[first].offset:frames[last].offset + frames[last].length])
+
+
+def make_silent_frame(header: bytes) -> bytes:
+    """
+    按参考帧头构造一个静音帧
+
+    侧信息全部为零时主数据长度为零，解码结果就是静音，不需要编码器。
+
+    Args:
+        header: 参考帧的帧头（至少 4 字节）
+
+    Returns:
+        与参考帧格式相同的静音帧
+    """
+    # 去掉 CRC 和填充位，保证帧长度固定
+    silent_header = bytes([0xFF, header[1] | 0x01, header[2] & 0xFD, header[3]])
+    frame = parse_frame_header(silent_header)
+    if frame is None:
+        raise ValueError("不是合法的 MPEG Layer III 帧头")
+    return silent_header + bytes(frame.length - 4)
+
+
+def frame_format(data: bytes, offset: int = 0) -> Tuple[int, int, bool]:
+    """帧的格式：(MPEG 版本位, 采样率索引, 是否单声道)，格式相同的帧可以直接拼接"""
+    return (data[offset + 1] >> 3) & 0x03, (data[offset + 2] >> 2) & 0x03, (data[offset + 3] >> 6) == 0x03
+
+
+def silence(duration: float, header: bytes) -> bytes:
+    """
+    生成指定时长的静音
+
+    Args:
+        duration: 时长（秒），按帧时长取整
+        header: 参考帧的帧头，静音帧与其格式相同
+
+    Returns:
+        由静音帧组成的 MP3 数据
+    """
+    frame = make_silent_frame(header)
+    count = max(0, round(duration / parse_frame_header(frame).duration))
+    return frame * count
+
+
+class FrameWriter:
+    """
+    逐个输出拼接后的 MP3 数据，用于边生成边发送
+
+    格式以第一个音频片段为准，之后的片段格式不一致时抛出 Mp3FormatError；
+    第一个音频片段之前的静音先记下，确定格式后再输出。
+    """
+
+    def __init__(self):
+        self.reference: Optional[bytes] = None  # 参考帧头
+        self._pending: List[float] = []
+        self._silences = {}
+
+    def write(self, part: Union[bytes, float]) -> bytes:
+        """
+        输出一个片段
+
+        Args:
+            part: MP3 数据（bytes / memoryview）或静音时长（秒）
+
+        Returns:
+            该片段对应的 MP3 数据，格式尚未确定的静音返回空字节串
+
+        Raises:
+            Mp3FormatError: 片段无法解析，或与之前的片段格式不一致
+        """
+        if isinstance(part, (int, float)):
+            if self.reference is None:
+                self._pending.append(part)
+                return b""
+            return self._silence(part)
+
+        frames = iter_frames(part)
+        if not frames:
+            raise Mp3FormatError("音频片段中没有可识别的 MP3 帧")
+        reference = self.reference
+        for frame in frames:
+            if reference is None:
+                reference = bytes(part[frame.offset:frame.offset + 4])
+            elif frame_format(part, frame.offset) != frame_format(reference):
+                raise Mp3FormatError("音频片段的采样率或声道不一致")
+
+        output = bytearray()
+        if self.reference is None:
+            self.reference = reference
+            for duration in self._pending:
+                output += self._silence(duration)
+            self._pending.clear()
+        view = memoryview(part)
+        for frame in frames:
+            output += view[frame.offset:frame.offset + frame.length]
+        return bytes(output)
+
+    def _silence(self, duration: float) -> bytes:
+        if duration not in self._silences:
+            self._silences[duration] = silence(duration, self.reference)
+        return self._silences[duration]
+
+
+def join(parts: List[Union[bytes, float]]) -> bytes:
+    """
+    按顺序拼接 MP3 片段和静音，不经过解码和重新编码
+
+    Args:
+        parts: MP3 数据（bytes / memoryview）或静音时长（秒）
+
+    Returns:
+        拼接后的 MP3 数据
+
+    Raises:
+        Mp3FormatError: 片段无法解析，或采样率、声道等格式不一致
+    """
+    writer = FrameWriter()
+    output = bytearray()
+    for part in parts:
+        output += writer.write(part)
+    if writer.reference is None:
+        raise Mp3FormatError("没有可用于确定格式的音频片段")
+    return bytes(output)
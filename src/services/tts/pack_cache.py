@@ -0,0 +1,345 @@
+import os
+import mmap
+import time
+import struct
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Any, List
+
+# 记录头：魔数、缓存键（MD5 的 16 字节）、标志位、数据长度
+RECORD_HEADER = struct.Struct("<4s16sBI")
+RECORD_MAGIC = b"WDPK"
+FLAG_DATA = 0
+FLAG_TOMBSTONE = 1
+
+
+class PackCache:
+    """
+    打包存储的音频缓存
+
+    音频按记录顺序追加写入分段文件（seg_00001.pack ...），启动时扫描记录头建立
+    偏移索引（键 -> 分段/偏移/长度）。读取时通过 mmap 返回 memoryview 切片，不产生拷贝。
+    删除只追加一条删除标记，空间需要通过离线压缩回收：
+
+        python -m src.services.tts.pack_cache compact cache/tts/pack
+
+    同一个目录只能由一个进程写入。
+    """
+
+    SEGMENT_PATTERN = "seg_{:05d}.pack"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 0, segment_max_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化打包缓存，扫描分段文件建立索引
+
+        Args:
+            cache_dir: 分段文件所在目录
+            max_bytes: 有效数据占用的最大字节数，0 表示不限制
+            segment_max_bytes: 单个分段文件的大小上限，超出后切换到新分段
+        """
+        self._cache_dir = cache_dir
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(0, max_bytes)
+        self._segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int, int]] = {}  # 键 -> (分段号, 数据偏移, 数据长度)
+        self._access: Dict[str, float] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._segment_sizes: Dict[int, int] = {}
+        self._total_bytes = 0
+        self._dead_bytes = 0  # 被覆盖或删除、等待压缩回收的字节数
+
+        # GC 统计
+        self.evictions = 0
+        self.gc_runs = 0
+        self.last_gc_time = None
+        self.last_gc_duration = 0.0
+
+        self.scan()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self._cache_dir / self.SEGMENT_PATTERN.format(segment_id)
+
+    def _segment_ids(self) -> List[int]:
+        ids = []
+        for path in self._cache_dir.glob("seg_*.pack"):
+            try:
+                ids.append(int(path.stem.split("_")[1]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(ids)
+
+    def scan(self) -> None:
+        """扫描所有分段文件的记录头，重建偏移索引（同步）"""
+        with self._lock:
+            self._index.clear()
+            self._access.clear()
+            self._maps.clear()
+            self._segment_sizes.clear()
+            self._total_bytes = 0
+            self._dead_bytes = 0
+            now = time.time()
+
+            for segment_id in self._segment_ids():
+                path = self._segment_path(segment_id)
+                for key, flags, data_offset, length in self._iter_records(path):
+                    old = self._index.pop(key, None)
+                    if old is not None:
+                        self._total_bytes -= old[2]
+                        self._dead_bytes += old[2]
+                    if flags == FLAG_TOMBSTONE:
+                        continue
+                    self._index[key] = (segment_id, data_offset, length)
+                    self._access[key] = now
+                    self._total_bytes += length
+                self._segment_sizes[segment_id] = path.stat().st_size
+
+    @staticmethod
+    def _iter_records(path: Path):
+        """
+        遍历分段文件中的记录
+
+        遇到写入中断导致的不完整记录时，截断文件到最后一条完整记录。
+        """
+        size = path.stat().st_size
+        if size == 0:
+            return
+        valid_end = 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                magic, raw_key, flags, length = RECORD_HEADER.unpack_from(view, offset)
+                data_offset = offset + RECORD_HEADER.size
+                if magic != RECORD_MAGIC or data_offset + length > size:
+                    break
+                yield raw_key.hex(), flags, data_offset, length
+                offset = data_offset + length
+                valid_end = offset
+
+        if valid_end < size:
+            print(f"分段文件存在不完整的记录，截断到 {valid_end} 字节: {path}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _get_map(self, segment_id: int, end: int) -> mmap.mmap:
+        """获取覆盖到 end 位置的分段映射，分段增长后重新映射，调用方需持有锁"""
+        view = self._maps.get(segment_id)
+        if view is None or len(view) < end:
+            with open(self._segment_path(segment_id), "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # 旧的映射可能仍被外部的 memoryview 引用，不主动关闭，引用释放后自动回收
+            self._maps[segment_id] = view
+        return view
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def read(self, key: str) -> Optional[memoryview]:
+        """
+        读取音频数据
+
+        Returns:
+            指向映射内存的 memoryview 切片，不存在时返回 None
+        """
+        # 写入和压缩在其他线程中修改索引和映射表，查找和映射都在锁内完成
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            segment_id, data_offset, length = entry
+            view = self._get_map(segment_id, data_offset + length)
+        self.touch(key)
+        return memoryview(view)[data_offset:data_offset + length]
+
+    def _append(self, key: str, flags: int, data: bytes) -> Tuple[int, int]:
+        """追加一条记录，返回 (分段号, 数据偏移)，调用方需持有锁"""
+        segment_ids = sorted(self._segment_sizes)
+        segment_id = segment_ids[-1] if segment_ids else 1
+        if self._segment_sizes.get(segment_id, 0) >= self._segment_max_bytes:
+            segment_id += 1
+
+        header = RECORD_HEADER.pack(RECORD_MAGIC, bytes.fromhex(key), flags, len(data))
+        offset = self._segment_sizes.get(segment_id, 0)
+        with open(self._segment_path(segment_id), "ab") as f:
+            f.write(header)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._segment_sizes[segment_id] = offset + len(header) + len(data)
+        return segment_id, offset + len(header)
+
+    def write(self, key: str, data: bytes) -> None:
+        """追加写入音频数据并更新索引（同步，需在线程中调用）"""
+        with self._lock:
+            segment_id, data_offset = self._append(key, FLAG_DATA, data)
+            old = self._index.get(key)
+            if old is not None:
+                self._total_bytes -= old[2]
+                self._dead_bytes += old[2]
+            self._index[key] = (segment_id, data_offset, len(data))
+            self._access[key] = time.time()
+            self._total_bytes += len(data)
+
+    def touch(self, key: str) -> None:
+        """记录一次访问，用于 LRU 淘汰"""
+        if key in self._index:
+            self._access[key] = time.time()
+
+    def remove(self, key: str) -> None:
+        """追加删除标记并更新索引（同步）"""
+        with self._lock:
+            entry = self._index.pop(key, None)
+            self._access.pop(key, None)
+            if entry is None:
+                return
+            self._append(key, FLAG_TOMBSTONE, b"")
+            self._total_bytes -= entry[2]
+            self._dead_bytes += entry[2]
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """
+        执行一次垃圾回收（同步，需在线程中调用）
+
+        超出容量上限时，按最近访问时间淘汰缓存，直到降到上限的 90%。
+        被淘汰的数据只是标记删除，磁盘空间在离线压缩时回收。
+        """
+        start_time = time.time()
+        evicted = 0
+        freed = 0
+        if self._max_bytes and self._total_bytes > self._max_bytes:
+            target = int(self._max_bytes * 0.9)
+            with self._lock:
+                candidates = sorted(self._access.items(), key=lambda item: item[1])
+            for key, _ in candidates:
+                if self._total_bytes <= target:
+                    break
+                entry = self._index.get(key)
+                if entry is None:
+                    continue
+                self.remove(key)
+                evicted += 1
+                freed += entry[2]
+
+        self.evictions += evicted
+        self.gc_runs += 1
+        self.last_gc_time = start_time
+        self.last_gc_duration = time.time() - start_time
+        return {
+            "sweptTempFiles": 0,
+            "evictions": evicted,
+            "freedBytes": freed
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取打包缓存统计信息"""
+        return {
+            "backend": "pack",
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "deadBytes": self._dead_bytes,
+            "segments": len(self._segment_sizes),
+            "maxBytes": self._max_bytes,
+            "evictions": self.evictions,
+            "gcRuns": self.gc_runs,
+            "lastGcTime": self.last_gc_time,
+            "lastGcDuration": round(self.last_gc_duration, 3)
+        }
+
+
+def compact(cache_dir: Path, segment_max_bytes: int = 64 * 1024 * 1024) -> Dict[str, int]:
+    """
+    离线压缩分段文件：只保留每个键的最新数据，丢弃被覆盖和被删除的记录
+
+    必须在服务停止时执行。
+
+    Args:
+        cache_dir: 分段文件所在目录
+        segment_max_bytes: 新分段文件的大小上限
+
+    Returns:
+        压缩前后的分段数和字节数
+    """
+    source = PackCache(cache_dir, segment_max_bytes=segment_max_bytes)
+    before_segments = source._segment_ids()
+    before_bytes = sum(source._segment_sizes.values())
+
+    # 先写入临时目录，原数据在新分段全部就位之前不会被删除，
+    # 因此遗留的临时目录（上次压缩中途退出）可以直接清空
+    staging_dir = cache_dir / "compact.tmp"
+    if staging_dir.exists():
+        for path in staging_dir.iterdir():
+            path.unlink()
+    target = PackCache(staging_dir, segment_max_bytes=segment_max_bytes)
+    for key in list(source._index):
+        target.write(key, bytes(source.read(key)))
+
+    # 新分段编号接在原分段之后：扫描时后面的记录覆盖前面的，
+    # 在任何一步中途退出，下次启动得到的索引都与压缩前相同
+    next_id = before_segments[-1] + 1 if before_segments else 1
+    for offset, segment_id in enumerate(sorted(target._segment_sizes)):
+        target._segment_path(segment_id).replace(source._segment_path(next_id + offset))
+    staging_dir.rmdir()
+
+    # 按编号从小到大删除原分段，删除标记总在被删除的数据之后，中途退出也不会恢复已删除的键
+    with source._lock:
+        source._maps.clear()
+    for segment_id in before_segments:
+        source._segment_path(segment_id).unlink()
+
+    after_bytes = sum(target._segment_sizes.values())
+    return {
+        "segmentsBefore": len(before_segments),
+        "segmentsAfter": len(target._segment_sizes),
+        "bytesBefore": before_bytes,
+        "bytesAfter": after_bytes
+    }
+
+
+def import_files(cache_dir: Path, words_dir: Path) -> int:
+    """
+    将按文件存放的缓存（<md5>.mp3）导入到打包缓存
+
+    Returns:
+        导入的条目数
+    """
+    pack = PackCache(cache_dir)
+    imported = 0
+    for path in words_dir.glob("*.mp3"):
+        key = path.stem
+        if key in pack:
+            continue
+        data = path.read_bytes()
+        if data:
+            pack.write(key, data)
+            imported += 1
+    return imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TTS 打包缓存维护工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = subparsers.add_parser("compact", help="离线压缩分段文件")
+    compact_parser.add_argument("cache_dir", type=Path, help="分段文件所在目录")
+
+    import_parser = subparsers.add_parser("import", help="导入按文件存放的缓存")
+    import_parser.add_argument("cache_dir", type=Path, help="分段文件所在目录")
+    import_parser.add_argument("words_dir", type=Path, help="按文件存放的缓存目录")
+
+    args = parser.parse_args()
+    if args.command == "compact":
+        print(f"压缩完成: {compact(args.cache_dir)}")
+    elif args.command == "import":
+        print(f"导入完成，共 {import_files(args.cache_dir, args.words_dir)} 条")
+
+
+if __name__ == "__main__":
+    main()
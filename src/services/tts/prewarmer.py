@@ -0,0 +1,240 @@
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from ...config.settings import Settings
+from ..file_service import FileService, get_file_service
+from .edge_tts import EdgeTTSService
+from .factory import TTSFactory
+from .upstream import CircuitOpenError, Priority
+
+
+class LessonPrewarmer:
+    """
+    课程音频预生成任务
+
+    遍历课程库中的所有词语，按配置的语音和语速在后台生成音频缓存。
+    上游请求以 WARMUP 优先级排队，实时请求排队时主动暂停，不占用学生听写的并发额度。
+    """
+
+    IDLE = "idle"
+    RUNNING = "running"
+    PAUSED = "paused"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        tts_service: EdgeTTSService,
+        file_service: FileService,
+        voices: List[str],
+        rates: List[float],
+        concurrency: int = 1
+    ):
+        """
+        初始化预生成任务
+
+        Args:
+            tts_service: Edge TTS 服务
+            file_service: 提供课程词语的文件服务（与接口共用同一份课程索引）
+            voices: 预生成使用的语音列表
+            rates: 预生成使用的语速列表
+            concurrency: 同时进行的请求数
+        """
+        self._tts = tts_service
+        self._file_service = file_service
+        self._voices = voices
+        self._rates = rates
+        self._concurrency = max(1, concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._resume_event = asyncio.Event()
+        self._resume_event.set()
+        self._state = self.IDLE
+        self._reset_progress()
+
+    def _reset_progress(self) -> None:
+        self.lessons = 0
+        self.total = 0
+        self.done = 0
+        self.cached = 0  # 开始前已有缓存的条目
+        self.generated = 0
+        self.failed = 0
+        self.current: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def start(self) -> bool:
+        """
+        开始预生成，已在运行时不重复启动
+
+        Returns:
+            是否启动了新的任务
+        """
+        if self._task is not None and not self._task.done():
+            return False
+        self._reset_progress()
+        self._resume_event.set()
+        self._state = self.RUNNING
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    def pause(self) -> bool:
+        """暂停预生成，已发出的请求会继续完成"""
+        if self._state != self.RUNNING:
+            return False
+        self._resume_event.clear()
+        self._state = self.PAUSED
+        print("课程音频预生成已暂停")
+        return True
+
+    def resume(self) -> bool:
+        """恢复预生成"""
+        if self._state != self.PAUSED:
+            return False
+        self._state = self.RUNNING
+        self._resume_event.set()
+        print("课程音频预生成已恢复")
+        return True
+
+    async def stop(self) -> None:
+        """停止预生成任务"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self._state in (self.RUNNING, self.PAUSED):
+            self._state = self.IDLE
+
+    def _collect_words(self) -> Tuple[int, List[str]]:
+        """读取所有课程的词语（同步），返回课程数和去重后的词语列表"""
+        file_service = self._file_service
+        lessons = file_service.read_lessons()
+        words: Dict[str, None] = {}
+        for lesson in lessons:
+            for word in file_service.get_words(lesson["grade"], lesson["lesson"]) or []:
+                if word:
+                    words[word] = None
+        return len(lessons), list(words)
+
+    async def _run(self) -> None:
+        self.started_at = time.time()
+        try:
+            self.lessons, words = await asyncio.to_thread(self._collect_words)
+            jobs = [
+                (word, voice, rate)
+                for voice in self._voices
+                for rate in self._rates
+                for word in words
+            ]
+            self.total = len(jobs)
+            print(f"开始预生成课程音频: {self.lessons} 个课程，{len(words)} 个词语，共 {self.total} 条")
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for job in jobs:
+                queue.put_nowait(job)
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self._concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
+            self._state = self.COMPLETED
+            print(f"课程音频预生成完成: 新生成 {self.generated} 条，已有缓存 {self.cached} 条，失败 {self.failed} 条")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._state = self.FAILED
+            self.error = str(e)
+            print(f"课程音频预生成失败: {str(e)}")
+        finally:
+            self.current = None
+            self.finished_at = time.time()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            word, voice, rate = queue.get_nowait()
+            if self._tts.check_cache_exists(word, voice, rate):
+                self.cached += 1
+                self.done += 1
+                continue
+
+            while True:
+                await self._resume_event.wait()
+                # 有实时请求在排队时让路，等它们拿到槽位后再继续
+                while self._tts.interactive_waiting():
+                    await asyncio.sleep(0.5)
+                self.current = word
+                try:
+                    audio = await self._tts.generate_audio(
+                        word,
+                        voice,
+                        rate,
+                        max_retries=3,
+                        priority=Priority.WARMUP
+                    )
+                except CircuitOpenError as e:
+                    # 上游熔断期间不消耗重试次数，等待恢复后重新生成当前词语
+                    await asyncio.sleep(max(1.0, e.retry_after))
+                    continue
+                break
+
+            if audio is None:
+                self.failed += 1
+            else:
+                self.generated += 1
+            self.done += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预生成进度"""
+        return {
+            "state": self._state,
+            "lessons": self.lessons,
+            "total": self.total,
+            "done": self.done,
+            "cached": self.cached,
+            "generated": self.generated,
+            "failed": self.failed,
+            "current": self.current,
+            "voices": self._voices,
+            "rates": self._rates,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "error": self.error
+        }
+
+
+_prewarmer: Optional[LessonPrewarmer] = None
+
+
+def get_prewarmer() -> Optional[LessonPrewarmer]:
+    """
+    获取全局的课程音频预生成任务
+
+    Returns:
+        预生成任务实例，Edge TTS 未启用时返回 None
+    """
+    global _prewarmer
+    if _prewarmer is None:
+        settings = Settings()
+        engine_config = settings.TTS_ENGINES.get("edge-tts", {})
+        if not engine_config.get("enabled", True):
+            return None
+        tts_service = TTSFactory.get_tts_service("edge-tts")
+        if tts_service is None:
+            return None
+        _prewarmer = LessonPrewarmer(
+            tts_service,
+            get_file_service(),
+            voices=settings.TTS_PREWARM_VOICES or [engine_config.get("default_voice", "zh-CN-XiaoxiaoNeural")],
+            rates=settings.TTS_PREWARM_RATES or [engine_config.get("default_rate", 1.0)],
+            concurrency=settings.TTS_PREWARM_CONCURRENCY
+        )
+    return _prewarmer
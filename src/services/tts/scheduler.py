@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+from ...config.settings import Settings
+from .upstream import AdaptiveLimiter, CircuitBreaker, CircuitOpenError, Priority, UpstreamTicket, is_upstream_error
+
+
+class UpstreamScheduler:
+    """
+    Edge TTS 上游调度器
+
+    进程内所有访问 Edge TTS 的请求（实时播放、缓存预检、批量导出、后台预生成）共用同一份
+    并发预算和熔断状态。排队的请求按优先级获得槽位，低优先级类别只能占用一部分并发上限，
+    保证批量导出等后台请求不会挤占学生听写的实时请求。
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        """
+        初始化调度器
+
+        Args:
+            settings: 配置，为 None 时读取默认配置
+        """
+        settings = settings or Settings()
+        class_shares = {}
+        for name, share in settings.TTS_UPSTREAM_CLASS_SHARES.items():
+            try:
+                class_shares[Priority[name.upper()]] = float(share)
+            except KeyError:
+                print(f"未知的上游优先级类别: {name}")
+
+        self.limiter = AdaptiveLimiter(
+            initial_limit=settings.TTS_UPSTREAM_INITIAL_CONCURRENCY,
+            max_limit=settings.TTS_UPSTREAM_MAX_CONCURRENCY,
+            latency_target=settings.TTS_UPSTREAM_LATENCY_TARGET,
+            class_shares=class_shares
+        )  # 上游自适应并发限制
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.TTS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.TTS_BREAKER_RESET_TIMEOUT
+        )  # 上游熔断器
+
+    def boost(self, ticket: UpstreamTicket, priority: int) -> None:
+        """提升排队凭证的优先级，并重新检查是否可以分配槽位"""
+        if priority < ticket.priority:
+            ticket.boost(priority)
+            self.limiter.reschedule()
+
+    def interactive_waiting(self) -> int:
+        """正在排队的实时请求数"""
+        return self.limiter.waiting_count(Priority.INTERACTIVE)
+
+    @asynccontextmanager
+    async def request(
+        self,
+        ticket: Optional[UpstreamTicket] = None,
+        measure_latency: bool = True
+    ) -> AsyncIterator[None]:
+        """
+        占用一个上游槽位执行请求，并根据结果更新熔断器
+
+        只有上游故障（见 UPSTREAM_ERRORS）计为失败，其他异常不影响熔断状态。
+
+        Args:
+            ticket: 排队凭证，为 None 时按实时请求处理
+            measure_latency: 成功时是否按耗时调整并发上限，见 AdaptiveLimiter.slot
+
+        Raises:
+            CircuitOpenError: 上游处于熔断状态
+        """
+        # 上游处于熔断状态时快速失败，不占用槽位
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.breaker.retry_after())
+
+        try:
+            async with self.limiter.slot(ticket, measure_latency):
+                yield
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_upstream_error(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_ignored()
+            raise
+        else:
+            self.breaker.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度器统计信息"""
+        return {
+            "limiter": self.limiter.get_stats(),
+            "breaker": self.breaker.get_stats()
+        }
+
+
+_scheduler: Optional[UpstreamScheduler] = None
+
+
+def get_upstream_scheduler(settings: Optional[Settings] = None) -> UpstreamScheduler:
+    """
+    获取进程内共享的上游调度器
+
+    Args:
+        settings: 首次创建时使用的配置
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = UpstreamScheduler(settings)
+    return _scheduler
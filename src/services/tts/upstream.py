@@ -0,0 +1,359 @@
+import time
+import asyncio
+import itertools
+from enum import IntEnum
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, List
+import aiohttp
+from edge_tts import exceptions as edge_tts_exceptions
+
+# 视为上游故障的异常：网络和 WebSocket 错误、超时、Edge TTS 的异常响应或未返回音频。
+# 其他异常（例如语音名称不合法）是调用方的问题，不参与并发调整和熔断，也不重试
+UPSTREAM_ERRORS = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    edge_tts_exceptions.UnknownResponse,
+    edge_tts_exceptions.UnexpectedResponse,
+    edge_tts_exceptions.NoAudioReceived,
+    edge_tts_exceptions.WebSocketError
+)
+
+
+def is_upstream_error(error: BaseException) -> bool:
+    """判断异常是否来自上游服务（可以重试，并计入熔断）"""
+    return isinstance(error, UPSTREAM_ERRORS)
+
+
+class Priority(IntEnum):
+    """上游请求的优先级，数值越小越优先"""
+    INTERACTIVE = 0  # 学生听写时的实时播放
+    PRECHECK = 1  # 听写开始前的缓存预检
+    BATCH = 2  # 教师导出完整听写 MP3
+    WARMUP = 3  # 后台预生成
+
+
+class UpstreamTicket:
+    """
+    一次上游请求的排队凭证
+
+    排队期间可以提升优先级（例如实时请求合并到了后台预生成的任务上）。
+    """
+
+    __slots__ = ("priority", "seq", "future", "granted")
+
+    _counter = itertools.count()
+
+    def __init__(self, priority: int = Priority.INTERACTIVE):
+        self.priority = priority
+        self.seq = next(self._counter)
+        self.future: Optional[asyncio.Future] = None
+        self.granted: Optional[int] = None  # 获得槽位时所属的优先级类别
+
+    def boost(self, priority: int) -> None:
+        """提升到更高的优先级"""
+        self.priority = min(self.priority, priority)
+
+
+class CircuitOpenError(Exception):
+    """上游服务处于熔断状态，请求被快速拒绝"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Edge TTS 服务暂时不可用，请在 {retry_after:.0f} 秒后重试")
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制器
+
+    请求成功且延迟低于目标值时，并发上限加性增长（每轮约 +1）；
+    出错或延迟超标时，并发上限乘性下降。
+    排队的请求按优先级（相同优先级按先后顺序）获得槽位。
+    可以为低优先级类别设置占用比例，为更高优先级的请求预留余量。
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 20,
+        latency_target: float = 5.0,
+        backoff_ratio: float = 0.5,
+        class_shares: Optional[Dict[int, float]] = None
+    ):
+        """
+        初始化限制器
+
+        Args:
+            initial_limit: 初始并发上限
+            min_limit: 并发上限的下限
+            max_limit: 并发上限的上限
+            latency_target: 目标延迟（秒），超过视为上游过载
+            backoff_ratio: 出错时并发上限的缩减比例
+            class_shares: 各优先级类别最多可占用的并发上限比例，未设置的类别不限制
+        """
+        self._min_limit = min_limit
+        self._max_limit = max(min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, min_limit), self._max_limit))
+        self._latency_target = latency_target
+        self._backoff_ratio = backoff_ratio
+        self._in_flight = 0
+        self._class_shares = dict(class_shares or {})
+        self._class_in_flight: Dict[int, int] = {}
+        self._waiters: List[UpstreamTicket] = []
+
+        # 统计
+        self.increases = 0
+        self.decreases = 0
+        self.last_latency = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self._min_limit, int(self._limit))
+
+    def class_limit(self, priority: int) -> int:
+        """指定优先级类别当前可占用的槽位数"""
+        share = self._class_shares.get(priority)
+        if share is None:
+            return self.limit
+        return max(1, min(self.limit, int(self.limit * share)))
+
+    def _can_grant(self, priority: int) -> bool:
+        return (
+            self._in_flight < self.limit
+            and self._class_in_flight.get(priority, 0) < self.class_limit(priority)
+        )
+
+    def _grant(self, ticket: UpstreamTicket) -> None:
+        ticket.granted = ticket.priority
+        self._in_flight += 1
+        self._class_in_flight[ticket.granted] = self._class_in_flight.get(ticket.granted, 0) + 1
+
+    def _ungrant(self, ticket: UpstreamTicket) -> None:
+        self._in_flight -= 1
+        if ticket.granted is not None:
+            self._class_in_flight[ticket.granted] -= 1
+            ticket.granted = None
+
+    async def acquire(self, ticket: Optional[UpstreamTicket] = None) -> UpstreamTicket:
+        """
+        获取一个并发槽位，超出上限时按优先级排队等待
+
+        Args:
+            ticket: 排队凭证，为 None 时按实时请求处理
+
+        Returns:
+            获得槽位的排队凭证，归还槽位时传给 release
+        """
+        ticket = ticket or UpstreamTicket()
+        # 没有可以先于它获得槽位的排队请求时直接放行
+        if self._can_grant(ticket.priority) and not any(
+            waiter.priority <= ticket.priority and self._can_grant(waiter.priority)
+            for waiter in self._waiters
+        ):
+            self._grant(ticket)
+            return ticket
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._waiters.append(ticket)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # 已经分配到槽位但被取消，归还槽位
+                self._ungrant(ticket)
+                self._wake_waiters()
+            elif ticket in self._waiters:
+                self._waiters.remove(ticket)
+            raise
+        finally:
+            ticket.future = None
+        return ticket
+
+    def release(
+        self,
+        ticket: UpstreamTicket,
+        latency: Optional[float] = None,
+        success: bool = True
+    ) -> None:
+        """
+        归还槽位并根据本次请求的结果调整并发上限
+
+        Args:
+            ticket: acquire 返回的排队凭证
+            latency: 本次请求耗时（秒），为 None 时不调整上限
+            success: 本次请求是否成功
+        """
+        self._ungrant(ticket)
+        if latency is not None:
+            self.last_latency = latency
+            if success and latency <= self._latency_target:
+                if self._limit < self._max_limit:
+                    self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+                    self.increases += 1
+            elif self._limit > self._min_limit:
+                self._limit = max(self._min_limit, self._limit * self._backoff_ratio)
+                self.decreases += 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            # 排队的请求不多，每次线性查找优先级最高的即可（优先级可能在排队期间被提升）
+            eligible = [t for t in self._waiters if self._can_grant(t.priority)]
+            if not eligible:
+                break
+            ticket = min(eligible, key=lambda t: (t.priority, t.seq))
+            self._waiters.remove(ticket)
+            if ticket.future is None or ticket.future.done():
+                continue
+            self._grant(ticket)
+            ticket.future.set_result(None)
+
+    def reschedule(self) -> None:
+        """排队请求的优先级变化后，重新检查是否可以分配槽位"""
+        self._wake_waiters()
+
+    def waiting_count(self, max_priority: int = Priority.INTERACTIVE) -> int:
+        """排队中优先级不低于 max_priority 的请求数"""
+        return sum(1 for ticket in self._waiters if ticket.priority <= max_priority)
+
+    @asynccontextmanager
+    async def slot(self, ticket: Optional[UpstreamTicket] = None, measure_latency: bool = True) -> AsyncIterator[None]:
+        """
+        占用一个槽位执行上游请求，结束后按耗时和结果调整并发上限
+
+        Args:
+            ticket: 排队凭证，为 None 时按实时请求处理
+            measure_latency: 成功时是否按耗时调整并发上限；耗时与单个词语不可比的请求（整课合成）传 False，
+                这类请求失败时仍会降低并发上限
+        """
+        ticket = await self.acquire(ticket)
+        start_time = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # 调用方取消不代表上游异常，不参与调整
+            self.release(ticket)
+            raise
+        except Exception as e:
+            if is_upstream_error(e):
+                self.release(ticket, time.monotonic() - start_time, success=False)
+            else:
+                self.release(ticket)
+            raise
+        else:
+            if measure_latency:
+                self.release(ticket, time.monotonic() - start_time, success=True)
+            else:
+                self.release(ticket)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限制器统计信息"""
+        return {
+            "limit": self.limit,
+            "minLimit": self._min_limit,
+            "maxLimit": self._max_limit,
+            "inFlight": self._in_flight,
+            "waiting": len(self._waiters),
+            "waitingInteractive": self.waiting_count(Priority.INTERACTIVE),
+            "classes": {
+                priority.name.lower(): {
+                    "limit": self.class_limit(priority),
+                    "inFlight": self._class_in_flight.get(priority, 0),
+                    "waiting": sum(1 for ticket in self._waiters if ticket.priority == priority)
+                }
+                for priority in Priority
+            },
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "lastLatency": round(self.last_latency, 3)
+        }
+
+
+class CircuitBreaker:
+    """
+    上游熔断器
+
+    连续失败达到阈值后进入打开状态，直接拒绝请求；等待 reset_timeout 后进入半开状态，
+    放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 熔断后等待多久（秒）放行探测请求
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+        # 统计
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        """距离允许探测请求还需等待的秒数"""
+        return max(0.0, self._reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        """判断是否允许请求上游"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            # 只放行一个探测请求；探测请求长时间没有结果时允许再次探测
+            if self._probe_started_at is None or now - self._probe_started_at >= self._reset_timeout:
+                self._probe_started_at = now
+                return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """记录一次成功"""
+        self._consecutive_failures = 0
+        self._probe_started_at = None
+        self._state = self.CLOSED
+
+    def record_ignored(self) -> None:
+        """请求因调用方的错误结束，不计入成功或失败；半开状态下允许再次探测"""
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """记录一次失败"""
+        self._consecutive_failures += 1
+        self._probe_started_at = None
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+            if self._state != self.OPEN:
+                self.trips += 1
+                print(f"Edge TTS 连续失败 {self._consecutive_failures} 次，触发熔断")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器统计信息"""
+        state = self.state
+        return {
+            "state": state,
+            "consecutiveFailures": self._consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retryAfter": round(self.retry_after(), 1) if state == self.OPEN else 0
+        }
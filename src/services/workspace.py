@@ -0,0 +1,77 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+
+
+class JobWorkspace:
+    """
+    单个导出任务独占的临时工作目录
+
+    目录名随机生成，多个任务可以同时运行而互不影响；任务结束时删除整个目录。
+    进程异常退出遗留的目录由 sweep_workspaces 在启动时清理。
+    """
+
+    PREFIX = "job_"
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: 存放所有任务工作目录的根目录
+        """
+        self._root = root
+        self.path: Path = None
+
+    async def __aenter__(self) -> "JobWorkspace":
+        self._root.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=self.PREFIX, dir=self._root))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.to_thread(self.cleanup)
+
+    def cleanup(self) -> None:
+        """删除工作目录（同步）"""
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def publish(self, source: Path, target: Path) -> None:
+        """
+        将工作目录中的文件原子地移动到目标位置（同步）
+
+        目标文件要么是旧版本，要么是完整的新版本，不会被读到写了一半的内容。
+        """
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+        except OSError:
+            # 不在同一个文件系统时先复制到目标目录，再原子替换
+            staging = target.with_name(f".{target.name}.{self.path.name}.tmp")
+            try:
+                shutil.copyfile(source, staging)
+                os.replace(staging, target)
+            finally:
+                staging.unlink(missing_ok=True)
+
+
+def sweep_workspaces(root: Path, max_age: float) -> int:
+    """
+    删除超过 max_age 秒未修改的任务工作目录（同步）
+
+    Returns:
+        删除的目录数
+    """
+    if not root.exists():
+        return 0
+    now = time.time()
+    removed = 0
+    for path in root.glob(f"{JobWorkspace.PREFIX}*"):
+        try:
+            if path.is_dir() and now - path.stat().st_mtime > max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
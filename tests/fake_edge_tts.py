@@ -0,0 +1,103 @@
+import re
+import json
+import html
+import struct
+import argparse
+from typing import Optional
+from aiohttp import web, WSMsgType
+from src.services.tts.mp3 import make_silent_frame
+from src.services.tts.boundaries import TICKS_PER_SECOND
+
+# 与 Edge TTS 相同的输出格式：MPEG-2 Layer III，24kHz，48kbps，单声道
+FRAME = make_silent_frame(b"\xff\xf3\x64\xc4")
+FRAME_TICKS = int(0.024 * TICKS_PER_SECOND)
+FRAMES_PER_CHAR = 10  # 每个字的时长
+PAUSE_FRAMES = 20  # 句子之间的停顿
+SEPARATORS = re.compile(r"[。！？.!?\n]+")
+
+
+class FakeEdgeTTSServer:
+    """
+    模拟 Edge TTS WebSocket 服务，用于测试和本地调试
+
+    按 SSML 中的文本逐句返回静音音频和 WordBoundary 事件，每个字固定时长，
+    可以在不访问微软服务的情况下验证整课合成和按词语边界切分。
+
+        python -m tests.fake_edge_tts --port 8765
+        EDGE_TTS_WSS_URL="ws://127.0.0.1:8765/edge?TrustedClientToken=fake"
+    """
+
+    def __init__(self, max_boundaries: Optional[int] = None):
+        """
+        Args:
+            max_boundaries: 每次请求最多发送的 WordBoundary 事件数，用于模拟无法按词语边界切分的情况
+        """
+        self.requests = 0  # 收到的合成请求数
+        self.max_boundaries = max_boundaries
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        return app
+
+    @staticmethod
+    def _text_message(request_id: str, path: str, body: str) -> str:
+        return (
+            f"X-RequestId:{request_id}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            f"Path:{path}\r\n\r\n{body}"
+        )
+
+    @staticmethod
+    def _audio_message(request_id: str, data: bytes) -> bytes:
+        headers = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+        return struct.pack(">H", len(headers)) + headers + data
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type != WSMsgType.TEXT or "Path:ssml" not in message.data:
+                continue
+            self.requests += 1
+            request_id = f"fake{self.requests:08d}"
+            match = re.search(r"<prosody[^>]*>(.*)</prosody>", message.data, re.S)
+            text = html.unescape(match.group(1)) if match else ""
+            sentences = [item.strip() for item in SEPARATORS.split(text) if item.strip()]
+
+            await ws.send_str(self._text_message(request_id, "turn.start", "{}"))
+            offset = PAUSE_FRAMES * FRAME_TICKS
+            await ws.send_bytes(self._audio_message(request_id, FRAME * PAUSE_FRAMES))
+            for index, sentence in enumerate(sentences):
+                frames = FRAMES_PER_CHAR * len(sentence)
+                if self.max_boundaries is not None and index >= self.max_boundaries:
+                    await ws.send_bytes(self._audio_message(request_id, FRAME * (frames + PAUSE_FRAMES)))
+                    offset += (frames + PAUSE_FRAMES) * FRAME_TICKS
+                    continue
+                metadata = {
+                    "Metadata": [{
+                        "Type": "WordBoundary",
+                        "Data": {
+                            "Offset": offset,
+                            "Duration": frames * FRAME_TICKS,
+                            "text": {"Text": sentence, "Length": len(sentence), "BoundaryType": "WordBoundary"}
+                        }
+                    }]
+                }
+                await ws.send_str(self._text_message(request_id, "audio.metadata", json.dumps(metadata)))
+                await ws.send_bytes(self._audio_message(request_id, FRAME * (frames + PAUSE_FRAMES)))
+                offset += (frames + PAUSE_FRAMES) * FRAME_TICKS
+            await ws.send_str(self._text_message(request_id, "turn.end", "{}"))
+        return ws
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="模拟 Edge TTS 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web.run_app(FakeEdgeTTSServer().create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.endpoints.tts import AudioResponse
+from src.middleware.concurrency import ConcurrencyMiddleware
+from src.services.tts.mp3 import make_silent_frame
+
+FRAME = make_silent_frame(b"\xff\xf3\x64\xc4")
+
+
+def test_memoryview_through_middleware():
+    # 打包缓存返回 memoryview，需要经过 BaseHTTPMiddleware 转发
+    app = FastAPI()
+    app.add_middleware(ConcurrencyMiddleware)
+
+    @app.get("/audio")
+    async def audio():
+        return AudioResponse(content=memoryview(FRAME * 3))
+
+    response = TestClient(app).get("/audio")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == FRAME * 3
@@ -0,0 +1,56 @@
+import pytest
+from src.services.tts import mp3
+from src.services.tts.boundaries import TICKS_PER_SECOND, align_words, split_audio
+
+FRAME = mp3.make_silent_frame(b"\xff\xf3\x64\xc4")
+
+
+def ticks(seconds: float) -> int:
+    return int(seconds * TICKS_PER_SECOND)
+
+
+def test_align_words_merges_events():
+    boundaries = [
+        (ticks(0.1), ticks(0.2), "苹"),
+        (ticks(0.3), ticks(0.2), "果"),
+        (ticks(0.6), ticks(0.1), "，"),
+        (ticks(0.8), ticks(0.4), "香蕉")
+    ]
+    assert align_words(["苹果", "香蕉"], boundaries) == [
+        (pytest.approx(0.1), pytest.approx(0.5)),
+        (pytest.approx(0.8), pytest.approx(1.2))
+    ]
+
+
+def test_align_words_stops_at_mismatch():
+    boundaries = [
+        (ticks(0.1), ticks(0.2), "苹果"),
+        (ticks(0.5), ticks(0.2), "橘子"),
+        (ticks(0.9), ticks(0.2), "香蕉")
+    ]
+    assert align_words(["苹果", "香蕉", "西瓜"], boundaries) == [
+        (pytest.approx(0.1), pytest.approx(0.3)), None, None
+    ]
+
+
+def test_split_audio_cuts_between_words():
+    # 50 帧共 1.2 秒：词语分别位于 0.24-0.48 和 0.72-0.96 秒
+    audio = FRAME * 50
+    boundaries = [(ticks(0.24), ticks(0.24), "苹果"), (ticks(0.72), ticks(0.24), "香蕉")]
+    segments = split_audio(audio, ["苹果", "香蕉"], boundaries)
+    # 在两个词语之间停顿的中点（0.6 秒，第 25 帧）切开
+    assert segments["苹果"] == FRAME * 25
+    assert segments["香蕉"] == FRAME * 25
+
+
+def test_split_audio_skips_unaligned_words():
+    audio = FRAME * 50
+    boundaries = [(ticks(0.24), ticks(0.24), "苹果")]
+    segments = split_audio(audio, ["苹果", "香蕉"], boundaries)
+    assert set(segments) == {"苹果"}
+    # 后一个词语未对齐时只保留一小段尾音：起始时间早于 0.78 秒的 33 帧
+    assert segments["苹果"] == FRAME * 33
+
+
+def test_split_audio_without_frames():
+    assert split_audio(b"", ["苹果"], [(0, ticks(0.2), "苹果")]) == {}
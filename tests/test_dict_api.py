@@ -0,0 +1,35 @@
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.endpoints import dict as dict_endpoints
+from src.services.file_service import FileService, get_file_service
+
+
+def create_client(tmp_path):
+    path = tmp_path / "words.xlsx"
+    pd.DataFrame({'年级': ['一年级'], '课时': ['第1课'], '词语': ['天地,人']}).to_excel(path, index=False)
+    service = FileService(path, use_snapshot=False)
+    app = FastAPI()
+    app.include_router(dict_endpoints.router)
+    app.dependency_overrides[get_file_service] = lambda: service
+    return TestClient(app)
+
+
+def test_bulk_words(tmp_path):
+    client = create_client(tmp_path)
+    response = client.post("/api/lessons/bulk", json={"lessons": [
+        {"grade": "一年级", "lesson": "第1课"},
+        {"grade": "一年级", "lesson": "第9课"}
+    ]})
+    assert response.status_code == 200
+    assert response.json()["data"] == [
+        {"grade": "一年级", "lesson": "第1课", "words": ["人", "天地"], "total": 2},
+        {"grade": "一年级", "lesson": "第9课", "words": None, "total": 0}
+    ]
+
+
+def test_bulk_words_limits_lesson_count(tmp_path):
+    client = create_client(tmp_path)
+    lessons = [{"grade": "一年级", "lesson": f"第{index}课"} for index in range(201)]
+    assert client.post("/api/lessons/bulk", json={"lessons": lessons}).status_code == 422
+    assert client.post("/api/lessons/bulk", json={"lessons": lessons[:200]}).status_code == 200
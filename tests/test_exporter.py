@@ -0,0 +1,35 @@
+import asyncio
+from src.config.settings import Settings
+from src.services.tts import mp3
+from src.services.tts.exporter import DictationExporter, export_key
+
+FRAME = mp3.make_silent_frame(b"\xff\xf3\x64\xc4")
+
+
+def create_exporter(tmp_path):
+    return DictationExporter(
+        None,
+        tmp_path / "jobs",
+        tmp_path / "exports",
+        tmp_path / "start.mp3",
+        tmp_path / "end.mp3",
+        Settings(AUDIO_CONCAT_ENGINE="python")
+    )
+
+
+def test_assemble_publishes_to_export_cache(tmp_path):
+    exporter = create_exporter(tmp_path)
+    key = export_key(["天地"], "zh-CN-XiaoxiaoNeural", 1.0, 2, 3.0)
+
+    async def run():
+        assert await exporter.cached_path(key) is None
+        path = await exporter.assemble([FRAME * 2, 0.048, FRAME], key)
+        assert path.read_bytes() == FRAME * 5
+        assert await exporter.cached_path(key) == path
+
+        # 文件被外部删除时从索引中移除
+        path.unlink()
+        assert await exporter.cached_path(key) is None
+        assert exporter.get_stats()["entries"] == 0
+
+    asyncio.run(run())
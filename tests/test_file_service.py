@@ -0,0 +1,80 @@
+import asyncio
+import pandas as pd
+import pytest
+from src.services.file_service import FileService
+
+
+def create_words_file(tmp_path):
+    path = tmp_path / "words.xlsx"
+    pd.DataFrame({'年级': ['一年级'], '课时': ['第1课'], '词语': ['天地,人']}).to_excel(path, index=False)
+    return path
+
+
+def test_edit_during_compaction_is_written_back(tmp_path):
+    service = FileService(create_words_file(tmp_path), use_snapshot=False, compact_delay=0.01)
+    compact = service.compact
+    calls = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        def compact_with_edit():
+            calls.append(compact())
+            if len(calls) == 1:
+                # 写回进行中时收到新的修改
+                asyncio.run_coroutine_threadsafe(service.add_words('一年级', '第2课', ['日月']), loop).result()
+            return calls[-1]
+
+        service.compact = compact_with_edit
+        assert await service.add_words('一年级', '第1课', ['天地', '你我'])
+        await asyncio.wait_for(service._compact_task, timeout=10)
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+    assert not service._changes.has_pending()
+    df = pd.read_excel(service.excel_path)
+    assert dict(zip(df['课时'], df['词语'])) == {'第1课': '天地,你我', '第2课': '日月'}
+
+
+def test_failed_load_is_not_retried_by_requests(tmp_path, monkeypatch):
+    path = tmp_path / "words.xlsx"
+    path.write_bytes(b"not an excel file")
+    service = FileService(path, use_snapshot=False)
+    with pytest.raises(Exception):
+        service.reload()
+    assert service.get_stats()["lastError"]
+
+    def fail_load():
+        raise AssertionError("请求中不应重新加载")
+
+    monkeypatch.setattr(service, "_load", fail_load)
+    assert len(service.catalog) == 0
+    assert service.read_lessons() == []
+    assert service.get_words('一年级', '第1课') is None
+
+
+def test_edited_words_match_reloaded_words(tmp_path):
+    service = FileService(create_words_file(tmp_path), use_snapshot=False, compact_delay=60)
+
+    async def run():
+        assert await service.add_words('一年级', '第1课', [' 天地 ', '天地', 'a,b', ''])
+        edited = service.get_words('一年级', '第1课')
+        await service.flush_changes()
+        return edited
+
+    edited = asyncio.run(run())
+    assert edited == ['a', 'b', '天地']
+    assert service.reload().get_words('一年级', '第1课') == ('a', 'b', '天地')
+
+
+def test_bulk_and_search_fall_back_when_first_load_fails(tmp_path):
+    path = tmp_path / "words.xlsx"
+    path.write_bytes(b"not an excel file")
+    service = FileService(path, use_snapshot=False)
+
+    assert service.get_words_bulk([('一年级', '第1课')]) == [
+        {'grade': '一年级', 'lesson': '第1课', 'words': None}
+    ]
+    assert service.search_words('天地') == []
+    with pytest.raises(ValueError):
+        service.search_words('天地', mode='fuzzy')
@@ -0,0 +1,36 @@
+import pytest
+from src.services.lesson_catalog import LessonCatalog
+
+CATALOG = LessonCatalog([
+    (('一年级', '第1课'), ['天地', '天空', '人']),
+    (('一年级', '第2课'), ['天地', '地上', '上下']),
+    (('二年级', '第1课'), ['天上', '地', '大地'])
+])
+
+
+def test_exact_search():
+    assert CATALOG.search('天地') == [('天地', (('一年级', '第1课'), ('一年级', '第2课')))]
+    assert CATALOG.search(' 人 ') == [('人', (('一年级', '第1课'),))]
+    assert CATALOG.search('天') == []
+
+
+def test_prefix_search():
+    words = [word for word, _ in CATALOG.search('天', mode='prefix')]
+    assert words == ['天上', '天地', '天空']
+    assert [word for word, _ in CATALOG.search('天', mode='prefix', limit=2)] == ['天上', '天地']
+    assert CATALOG.search('月', mode='prefix') == []
+
+
+def test_char_search():
+    # 包含查询中的每一个字，较短的词语在前
+    assert [word for word, _ in CATALOG.search('地', mode='char')] == ['地', '地上', '大地', '天地']
+    assert [word for word, _ in CATALOG.search('地天', mode='char')] == ['天地']
+    assert [word for word, _ in CATALOG.search('地', mode='char', limit=1)] == ['地']
+    assert CATALOG.search('地月', mode='char') == []
+
+
+def test_search_edge_cases():
+    assert CATALOG.search('  ', mode='prefix') == []
+    assert CATALOG.search('天', mode='prefix', limit=0) == []
+    with pytest.raises(ValueError):
+        CATALOG.search('天', mode='fuzzy')
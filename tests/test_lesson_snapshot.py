@@ -0,0 +1,92 @@
+import os
+import sqlite3
+from contextlib import closing
+import pandas as pd
+import pytest
+from src.services import lesson_snapshot
+from src.services.lesson_snapshot import load_catalog, read_meta, snapshot_path
+
+
+@pytest.fixture
+def words_file(tmp_path):
+    path = tmp_path / "words.xlsx"
+    pd.DataFrame({
+        '年级': ['一年级', '一年级'],
+        '课时': ['第1课', '第2课'],
+        '词语': ['天地,人', '日月']
+    }).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """记录解析 Excel 文件的次数"""
+    calls = []
+    read_excel = pd.read_excel
+
+    def counting_read_excel(*args, **kwargs):
+        calls.append(args)
+        return read_excel(*args, **kwargs)
+
+    monkeypatch.setattr(lesson_snapshot.pd, "read_excel", counting_read_excel)
+    return calls
+
+
+def test_first_load_compiles_snapshot(words_file, parses):
+    catalog = load_catalog(words_file)
+    assert catalog.get_words('一年级', '第1课') == ('人', '天地')
+    assert len(parses) == 1
+    meta = read_meta(snapshot_path(words_file))
+    assert meta["source_size"] == str(words_file.stat().st_size)
+
+
+def test_unchanged_file_reuses_snapshot(words_file, parses, monkeypatch):
+    expected = list(load_catalog(words_file).items())
+
+    def no_digest(path):
+        raise AssertionError("修改时间和大小不变时不应计算哈希")
+
+    monkeypatch.setattr(lesson_snapshot, "file_digest", no_digest)
+    assert list(load_catalog(words_file).items()) == expected
+    assert len(parses) == 1
+
+
+def test_touch_refreshes_meta_without_reparse(words_file, parses):
+    load_catalog(words_file)
+    stat = words_file.stat()
+    os.utime(words_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert load_catalog(words_file).get_words('一年级', '第2课') == ('日月',)
+    assert len(parses) == 1
+    meta = read_meta(snapshot_path(words_file))
+    assert meta["source_mtime_ns"] == str(words_file.stat().st_mtime_ns)
+
+
+def test_changed_content_rebuilds(words_file, parses):
+    load_catalog(words_file)
+    pd.DataFrame({'年级': ['一年级'], '课时': ['第1课'], '词语': ['山水']}).to_excel(words_file, index=False)
+    assert load_catalog(words_file).get_words('一年级', '第1课') == ('山水',)
+    assert len(parses) == 2
+
+
+def test_version_mismatch_rebuilds(words_file, parses):
+    load_catalog(words_file)
+    target = snapshot_path(words_file)
+    with closing(sqlite3.connect(target)) as conn, conn:
+        conn.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+    assert read_meta(target) is None
+
+    assert load_catalog(words_file).get_words('一年级', '第1课') == ('人', '天地')
+    assert len(parses) == 2
+    assert read_meta(target)["version"] == str(lesson_snapshot.SNAPSHOT_VERSION)
+
+
+def test_corrupt_snapshot_rebuilds(words_file, parses):
+    load_catalog(words_file)
+    target = snapshot_path(words_file)
+    target.write_bytes(b"not a sqlite database")
+    assert read_meta(target) is None
+
+    assert load_catalog(words_file).get_words('一年级', '第1课') == ('人', '天地')
+    assert len(parses) == 2
+    assert read_meta(target) is not None
@@ -0,0 +1,61 @@
+import asyncio
+import edge_tts
+from aiohttp import web
+import src.services.tts.scheduler
+from src.config.settings import Settings
+from src.services.tts.disk_cache import DiskCache
+from src.services.tts.edge_tts import EdgeTTSService
+from tests.fake_edge_tts import FakeEdgeTTSServer
+from src.services.tts.mp3 import iter_frames
+
+WORDS = ["苹果", "香蕉", "西瓜", "葡萄", "橘子"]
+
+
+async def run_lesson(tmp_path, server: FakeEdgeTTSServer):
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        service = EdgeTTSService(Settings(
+            EDGE_TTS_WSS_URL=f"ws://127.0.0.1:{port}/edge?TrustedClientToken=fake",
+            TTS_LESSON_SYNTHESIS=True,
+            TTS_CACHE_BACKEND="files"
+        ))
+        service._disk_cache = DiskCache(tmp_path)
+        try:
+            results = await asyncio.wait_for(service.generate_audio_batch(WORDS, max_retries=1), timeout=30)
+            return results, service.get_stats()["upstream"]["limiter"]
+        finally:
+            await service._close_session()
+    finally:
+        await runner.cleanup()
+
+
+def isolate(monkeypatch):
+    # 调度器是进程内单例，服务会修改 edge-tts 的全局地址
+    monkeypatch.setattr(src.services.tts.scheduler, "_scheduler", None)
+    monkeypatch.setattr(edge_tts.communicate, "WSS_URL", edge_tts.communicate.WSS_URL)
+
+
+def test_lesson_synthesis_splits_words(tmp_path, monkeypatch):
+    isolate(monkeypatch)
+    server = FakeEdgeTTSServer()
+    results, limiter = asyncio.run(run_lesson(tmp_path, server))
+    assert server.requests == 1
+    assert set(results) == set(WORDS)
+    assert all(iter_frames(audio) for audio in results.values())
+    assert limiter["inFlight"] == 0
+
+
+def test_lesson_synthesis_falls_back_per_word(tmp_path, monkeypatch):
+    # 只有第一个词语能按边界切分，其余词语各自单独生成
+    isolate(monkeypatch)
+    server = FakeEdgeTTSServer(max_boundaries=1)
+    results, limiter = asyncio.run(run_lesson(tmp_path, server))
+    assert server.requests == len(WORDS)
+    assert set(results) == set(WORDS)
+    assert all(audio and iter_frames(audio) for audio in results.values())
+    assert limiter["inFlight"] == 0
+    assert all(item["inFlight"] == 0 for item in limiter["classes"].values())
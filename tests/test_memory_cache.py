@@ -0,0 +1,46 @@
+import asyncio
+import src.services.tts.scheduler
+from src.config.settings import Settings
+from src.services.tts.disk_cache import DiskCache
+from src.services.tts.edge_tts import EdgeTTSService
+from src.services.tts.memory_cache import AudioMemoryCache
+from src.services.tts.mp3 import make_silent_frame
+
+AUDIO = make_silent_frame(b"\xff\xf3\x64\xc4") * 10
+
+
+def test_lru_eviction_by_bytes():
+    cache = AudioMemoryCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert "b" not in cache and "a" in cache
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_get_without_counting_miss():
+    cache = AudioMemoryCache(max_bytes=10)
+    assert cache.get("a", count_miss=False) is None
+    assert cache.misses == 0
+    cache.record_miss()
+    assert cache.get_stats()["hitRate"] == 0.0 and cache.misses == 1
+
+
+def test_endpoint_lookup_counts_miss_once(tmp_path, monkeypatch):
+    # 接口先查内存缓存，未命中时再调用 generate_audio（命中文件缓存）
+    monkeypatch.setattr(src.services.tts.scheduler, "_scheduler", None)
+
+    async def run():
+        service = EdgeTTSService(Settings(TTS_CACHE_BACKEND="files"))
+        service._disk_cache = DiskCache(tmp_path)
+        service._disk_cache.write(service._get_cache_key("苹果", "zh-CN-XiaoxiaoNeural", 1.0), AUDIO)
+
+        assert service.get_memory_cached("苹果", "zh-CN-XiaoxiaoNeural", 1.0) is None
+        assert await service.generate_audio("苹果") == AUDIO
+        assert service.get_memory_cached("苹果", "zh-CN-XiaoxiaoNeural", 1.0) == AUDIO
+        await service._close_session()
+        return service.get_stats()["memoryCache"]
+
+    stats = asyncio.run(run())
+    assert (stats["hits"], stats["misses"]) == (1, 1)
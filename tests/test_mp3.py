@@ -0,0 +1,66 @@
+import pytest
+from src.services.tts import mp3
+
+# Edge TTS 的输出格式：MPEG-2 Layer III，24kHz，48kbps，单声道，每帧 144 字节、24 毫秒
+HEADER = b"\xff\xf3\x64\xc4"
+FRAME = mp3.make_silent_frame(HEADER)
+
+
+def test_parse_frame_header():
+    frame = mp3.parse_frame_header(FRAME)
+    assert frame.length == 144
+    assert frame.duration == pytest.approx(0.024)
+    assert mp3.parse_frame_header(b"\x00" * 4) is None
+
+
+def test_iter_frames_skips_id3_and_garbage():
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+    data = id3 + FRAME + b"junk" + FRAME * 2 + FRAME[:10]
+    frames = mp3.iter_frames(data)
+    assert len(frames) == 3
+    assert frames[0].offset == len(id3)
+    assert frames[1].offset == len(id3) + len(FRAME) + 4
+
+
+def test_slice_frames():
+    data = FRAME * 10
+    frames = mp3.iter_frames(data)
+    assert mp3.slice_frames(data, frames, 0.048, 0.12) == FRAME * 3
+    assert mp3.slice_frames(data, frames, 1.0, 2.0) == b""
+
+
+def test_silence_duration():
+    assert len(mp3.iter_frames(mp3.silence(0.24, HEADER))) == 10
+    assert mp3.silence(0, HEADER) == b""
+
+
+def test_join_frames_and_silence():
+    result = mp3.join([0.048, FRAME * 2, 0.024, FRAME])
+    assert result == FRAME * 6
+    assert sum(frame.duration for frame in mp3.iter_frames(result)) == pytest.approx(0.144)
+
+
+def test_join_accepts_memoryview():
+    assert mp3.join([memoryview(FRAME * 2)]) == FRAME * 2
+
+
+def test_join_rejects_mismatched_format():
+    # MPEG-1 Layer III，44.1kHz，单声道
+    other = mp3.make_silent_frame(b"\xff\xfb\x90\xc4")
+    with pytest.raises(mp3.Mp3FormatError):
+        mp3.join([FRAME, other])
+
+
+def test_join_requires_audio():
+    with pytest.raises(mp3.Mp3FormatError):
+        mp3.join([1.0])
+    with pytest.raises(mp3.Mp3FormatError):
+        mp3.join([b"not mp3"])
+
+
+def test_frame_writer_matches_join():
+    parts = [0.5, FRAME * 3, 0.1, FRAME, 0.5]
+    writer = mp3.FrameWriter()
+    streamed = b"".join(writer.write(part) for part in parts)
+    assert writer.reference == FRAME[:4]
+    assert streamed == mp3.join(parts)
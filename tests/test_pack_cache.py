@@ -0,0 +1,99 @@
+import threading
+from pathlib import Path
+import pytest
+from src.services.tts import pack_cache
+from src.services.tts.pack_cache import PackCache, compact
+
+KEYS = [f"{index:032x}" for index in range(6)]
+
+
+def fill(cache_dir: Path) -> PackCache:
+    cache = PackCache(cache_dir, segment_max_bytes=64)
+    for index, key in enumerate(KEYS):
+        cache.write(key, bytes([index]) * 40)
+    cache.write(KEYS[0], b"new")  # 覆盖
+    cache.remove(KEYS[1])  # 删除
+    return cache
+
+
+def contents(cache_dir: Path):
+    cache = PackCache(cache_dir)
+    return {key: bytes(cache.read(key)) for key in KEYS if key in cache}
+
+
+def test_compact_keeps_latest_data(tmp_path):
+    fill(tmp_path)
+    expected = contents(tmp_path)
+    assert KEYS[1] not in expected and expected[KEYS[0]] == b"new"
+
+    result = compact(tmp_path, segment_max_bytes=64)
+    assert result["bytesAfter"] < result["bytesBefore"]
+    assert contents(tmp_path) == expected
+    assert not (tmp_path / "compact.tmp").exists()
+
+
+@pytest.mark.parametrize("fail_after", [0, 1, 3])
+def test_compact_interrupted_while_deleting(tmp_path, monkeypatch, fail_after):
+    # 删除原分段的过程中退出，下次启动的内容与压缩前一致，再次压缩后也一致
+    fill(tmp_path)
+    expected = contents(tmp_path)
+
+    unlink = Path.unlink
+    deleted = []
+
+    def crashing_unlink(path, *args, **kwargs):
+        if path.parent == tmp_path and len(deleted) >= fail_after:
+            raise KeyboardInterrupt
+        deleted.append(path)
+        unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "unlink", crashing_unlink)
+    with pytest.raises(KeyboardInterrupt):
+        compact(tmp_path, segment_max_bytes=64)
+    monkeypatch.setattr(Path, "unlink", unlink)
+
+    assert contents(tmp_path) == expected
+    compact(tmp_path, segment_max_bytes=64)
+    assert contents(tmp_path) == expected
+
+
+def test_compact_interrupted_while_staging(tmp_path, monkeypatch):
+    fill(tmp_path)
+    expected = contents(tmp_path)
+
+    def crashing_write(self, key, data):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(pack_cache.PackCache, "write", crashing_write)
+    with pytest.raises(KeyboardInterrupt):
+        compact(tmp_path, segment_max_bytes=64)
+    monkeypatch.undo()
+
+    assert contents(tmp_path) == expected
+    compact(tmp_path, segment_max_bytes=64)
+    assert contents(tmp_path) == expected
+
+
+def test_concurrent_reads_and_writes(tmp_path):
+    # 写入会切换分段并重新映射，读取在其他线程中同时进行
+    cache = PackCache(tmp_path, segment_max_bytes=4096)
+    errors = []
+
+    def writer(worker):
+        for index in range(200):
+            cache.write(f"{worker:016x}{index:016x}", bytes([worker]) * (index + 1))
+
+    def reader(worker):
+        for _ in range(3):
+            for index in range(200):
+                data = cache.read(f"{worker:016x}{index:016x}")
+                if data is not None and bytes(data) != bytes([worker]) * (index + 1):
+                    errors.append((worker, index))
+
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(4) for target in (writer, reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) == 800
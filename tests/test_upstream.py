@@ -0,0 +1,165 @@
+import asyncio
+import aiohttp
+import pytest
+import src.services.tts.scheduler
+from src.config.settings import Settings
+from src.services.tts import upstream
+from src.services.tts.edge_tts import EdgeTTSService
+from src.services.tts.scheduler import UpstreamScheduler
+from src.services.tts.upstream import AdaptiveLimiter, CircuitBreaker, Priority, UpstreamTicket
+
+
+def test_waiters_granted_by_priority():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+        first = await limiter.acquire(UpstreamTicket(Priority.WARMUP))
+        order = []
+
+        async def request(priority):
+            ticket = await limiter.acquire(UpstreamTicket(priority))
+            order.append(priority)
+            limiter.release(ticket)
+
+        tasks = [asyncio.create_task(request(priority)) for priority in (Priority.WARMUP, Priority.BATCH, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["waiting"] == 3
+        limiter.release(first)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == [Priority.INTERACTIVE, Priority.BATCH, Priority.WARMUP]
+
+
+def test_class_share_reserves_slots():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4, class_shares={Priority.WARMUP: 0.5})
+        warmups = [await limiter.acquire(UpstreamTicket(Priority.WARMUP)) for _ in range(2)]
+        # 后台类别已占满自己的份额，继续排队；实时请求仍可直接获得槽位
+        blocked = asyncio.create_task(limiter.acquire(UpstreamTicket(Priority.WARMUP)))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        interactive = await asyncio.wait_for(limiter.acquire(UpstreamTicket(Priority.INTERACTIVE)), 1)
+        stats = limiter.get_stats()
+        assert stats["classes"]["warmup"] == {"limit": 2, "inFlight": 2, "waiting": 1}
+        assert stats["inFlight"] == 3
+
+        limiter.release(warmups[0])
+        await asyncio.wait_for(blocked, 1)
+        for ticket in [warmups[1], blocked.result(), interactive]:
+            limiter.release(ticket)
+        return limiter.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["inFlight"] == 0
+    assert all(item["inFlight"] == 0 for item in stats["classes"].values())
+
+
+def test_aimd_adjusts_limit():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=8, latency_target=1.0)
+        for _ in range(4):
+            limiter.release(await limiter.acquire(), latency=0.1)
+        assert limiter.limit == 3
+        assert limiter.increases == 4
+
+        # 延迟超过目标值：乘性下降
+        limiter.release(await limiter.acquire(), latency=2.0)
+        assert limiter.limit == 1
+        assert limiter.decreases == 1
+        # 失败：乘性下降，不低于下限
+        limiter.release(await limiter.acquire(), latency=0.1, success=False)
+        assert limiter.limit == 1
+        assert limiter.decreases == 2
+
+        # 不提供耗时时不调整
+        limiter.release(await limiter.acquire())
+        assert (limiter.increases, limiter.decreases) == (4, 2)
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_and_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(upstream.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    # 等待后进入半开状态，只放行一个探测请求
+    now[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # 探测失败重新打开
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+
+    now[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_only_upstream_errors_trip_breaker():
+    async def run():
+        scheduler = UpstreamScheduler(Settings(TTS_BREAKER_FAILURE_THRESHOLD=2))
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                async with scheduler.request():
+                    raise ValueError("调用方错误")
+        assert scheduler.breaker.state == CircuitBreaker.CLOSED
+        assert scheduler.limiter.decreases == 0
+
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientConnectionError):
+                async with scheduler.request():
+                    raise aiohttp.ClientConnectionError("连接失败")
+        assert scheduler.breaker.state == CircuitBreaker.OPEN
+        assert scheduler.limiter.get_stats()["inFlight"] == 0
+
+    asyncio.run(run())
+
+
+def test_invalid_voice_does_not_trip_breaker(monkeypatch):
+    monkeypatch.setattr(src.services.tts.scheduler, "_scheduler", None)
+
+    async def run():
+        service = EdgeTTSService(Settings(TTS_BREAKER_FAILURE_THRESHOLD=5))
+        try:
+            # 参数错误不重试，也不占用上游槽位
+            assert await service.generate_audio("苹果", voice="bogus voice!", max_retries=5, initial_retry_delay=0) is None
+        finally:
+            await service._close_session()
+        return service.get_stats()["upstream"]
+
+    stats = asyncio.run(run())
+    assert stats["breaker"]["state"] == CircuitBreaker.CLOSED
+    assert stats["breaker"]["consecutiveFailures"] == 0
+    assert stats["limiter"]["decreases"] == 0
+
+
+def test_slow_lesson_request_keeps_limit(monkeypatch):
+    # 整课合成成功时不按耗时调整并发上限
+    now = [0.0]
+    monkeypatch.setattr(upstream.time, "monotonic", lambda: now[0])
+
+    async def run():
+        scheduler = UpstreamScheduler(Settings(TTS_UPSTREAM_LATENCY_TARGET=5.0))
+        limit = scheduler.limiter.limit
+        async with scheduler.request(measure_latency=False):
+            now[0] += 30
+        assert scheduler.limiter.limit == limit
+        assert scheduler.limiter.decreases == 0
+
+        async with scheduler.request():
+            now[0] += 30
+        assert scheduler.limiter.decreases == 1
+
+    asyncio.run(run())